@@ -0,0 +1,48 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.BACKGROUND_WORKERS,
+                thread_name_prefix='yatube-background',
+            )
+    return _executor
+
+
+def run(func, *args):
+    """Выполняет func в фоновом пуле потоков или сразу, если пул выключен."""
+    if not settings.BACKGROUND_WORKERS:
+        return call(func, *args)
+
+    def task():
+        try:
+            return call(func, *args)
+        finally:
+            connection.close()
+
+    return get_executor().submit(task)
+
+
+def call(func, *args):
+    try:
+        return func(*args)
+    except Exception:
+        logger.exception('Фоновая задача %s упала', func.__name__)
+
+
+def defer(func, *args):
+    """Ставит func в фоновый пул после коммита текущей транзакции."""
+    transaction.on_commit(lambda: run(func, *args))
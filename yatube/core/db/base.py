@@ -0,0 +1,20 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite с прагмами из PRAGMAS и записью через BEGIN IMMEDIATE.
+
+    Обычный BEGIN откладывает блокировку до первой записи, и если другой
+    процесс успел записать раньше, SQLite сразу отвечает «database is
+    locked», не дожидаясь busy_timeout. BEGIN IMMEDIATE берет блокировку
+    на запись в начале транзакции, и конкурирующие воркеры ждут очереди.
+    """
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict.get('PRAGMAS', {}).items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
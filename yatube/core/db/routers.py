@@ -0,0 +1,23 @@
+CACHE_APP_LABEL = 'django_cache'
+
+
+class CacheRouter:
+    """Таблица кэша в отдельной базе `cache`, остальные модели — вне ее.
+
+    Запись в кэш в SQLite иначе брала бы блокировку основной базы и
+    выстраивала в очередь с собой обычные запросы страниц.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == CACHE_APP_LABEL:
+            return 'cache'
+        return None
+
+    db_for_write = db_for_read
+
+    def allow_migrate(self, db, app_label, **hints):
+        if app_label == CACHE_APP_LABEL:
+            return db == 'cache'
+        if db == 'cache':
+            return False
+        return None
@@ -0,0 +1,210 @@
+import functools
+import json
+import logging
+import threading
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNTERS = {
+    'queries': ('yatube_db_queries_total', 'Запросы к БД'),
+    'db_time': ('yatube_db_duration_seconds_total', 'Время запросов к БД'),
+    'template_time': (
+        'yatube_template_duration_seconds_total', 'Время рендера шаблонов'
+    ),
+    'cache_hits': ('yatube_cache_hits_total', 'Попадания в кэш'),
+    'cache_misses': ('yatube_cache_misses_total', 'Промахи кэша'),
+    'bytes': ('yatube_response_bytes_total', 'Отданные байты'),
+}
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    __slots__ = (
+        'queries', 'db_time', 'template_time', 'cache_hits',
+        'cache_misses', 'rendering',
+    )
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.rendering = False
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += perf_counter() - started
+            self.queries += 1
+
+
+def current():
+    return getattr(_local, 'metrics', None)
+
+
+def record_cache(hit):
+    metrics = current()
+    if metrics is None:
+        return
+    if hit:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+def instrument_templates():
+    """Считает время рендера шаблонов; вложенные include не суммируются."""
+    original = Template.render
+    if getattr(original, 'instrumented', False):
+        return
+
+    @functools.wraps(original)
+    def render(self, context):
+        metrics = current()
+        if metrics is None or metrics.rendering:
+            return original(self, context)
+        metrics.rendering = True
+        started = perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            metrics.template_time += perf_counter() - started
+            metrics.rendering = False
+
+    render.instrumented = True
+    Template.render = render
+
+
+class Registry:
+    """Накопленные метрики по именам представлений в этом процессе."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, view, metrics, duration, size):
+        with self.lock:
+            stats = self.views.get(view)
+            if stats is None:
+                stats = self.views[view] = {
+                    'count': 0,
+                    'duration': 0.0,
+                    'buckets': [0] * len(BUCKETS),
+                    **dict.fromkeys(COUNTERS, 0),
+                }
+            stats['count'] += 1
+            stats['duration'] += duration
+            for index, bound in enumerate(BUCKETS):
+                if duration <= bound:
+                    stats['buckets'][index] += 1
+            stats['queries'] += metrics.queries
+            stats['db_time'] += metrics.db_time
+            stats['template_time'] += metrics.template_time
+            stats['cache_hits'] += metrics.cache_hits
+            stats['cache_misses'] += metrics.cache_misses
+            stats['bytes'] += size
+
+    def clear(self):
+        with self.lock:
+            self.views.clear()
+
+    def render(self):
+        """Метрики в текстовом формате Prometheus."""
+        with self.lock:
+            views = {
+                view: {**stats, 'buckets': stats['buckets'][:]}
+                for view, stats in sorted(self.views.items())
+            }
+        name = 'yatube_request_duration_seconds'
+        lines = [
+            f'# HELP {name} Время ответа',
+            f'# TYPE {name} histogram',
+        ]
+        for view, stats in views.items():
+            label = f'view="{view}"'
+            for bound, count in zip(BUCKETS, stats['buckets']):
+                lines.append(f'{name}_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(
+                f'{name}_bucket{{{label},le="+Inf"}} {stats["count"]}'
+            )
+            lines.append(f'{name}_sum{{{label}}} {stats["duration"]}')
+            lines.append(f'{name}_count{{{label}}} {stats["count"]}')
+        for field, (metric, description) in COUNTERS.items():
+            lines.append(f'# HELP {metric} {description}')
+            lines.append(f'# TYPE {metric} counter')
+            for view, stats in views.items():
+                lines.append(f'{metric}{{view="{view}"}} {stats[field]}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name
+
+
+def server_timing(duration, metrics):
+    return ', '.join([
+        f'app;dur={duration * 1000:.1f}',
+        f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} q"',
+        f'tpl;dur={metrics.template_time * 1000:.1f}',
+        f'cache;desc="hit={metrics.cache_hits} miss={metrics.cache_misses}"',
+    ])
+
+
+class MetricsMiddleware:
+    """Время ответа, запросы к БД, рендер, кэш и размер ответа по view.
+
+    Результат попадает в реестр для /metrics, в заголовок Server-Timing
+    (если включен SERVER_TIMING) и в строку лога core.metrics.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument_templates()
+
+    def __call__(self, request):
+        metrics = _local.metrics = RequestMetrics()
+        started = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _local.metrics = None
+        duration = perf_counter() - started
+        size = 0 if response.streaming else len(response.content)
+        view = view_name(request)
+        registry.record(view, metrics, duration, size)
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = server_timing(duration, metrics)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'view': view,
+                'method': request.method,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 2),
+                'queries': metrics.queries,
+                'db_ms': round(metrics.db_time * 1000, 2),
+                'template_ms': round(metrics.template_time * 1000, 2),
+                'cache_hits': metrics.cache_hits,
+                'cache_misses': metrics.cache_misses,
+                'bytes': size,
+            }))
+        return response
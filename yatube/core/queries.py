@@ -0,0 +1,190 @@
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import traceback
+from collections import Counter
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+from .metrics import view_name
+
+logger = logging.getLogger(__name__)
+
+STRING = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+PLACEHOLDERS = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+SPACES = re.compile(r'\s+')
+TRANSACTION = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+STACK_LIMIT = 8
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def normalize(sql):
+    """Форма запроса без значений: WHERE id = 1 и id = 2 совпадают."""
+    sql = STRING.sub('?', sql)
+    sql = NUMBER.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = PLACEHOLDERS.sub('(...)', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    return hashlib.md5(normalize(sql).encode()).hexdigest()[:12]
+
+
+def project_stack():
+    """Кадры стека из кода проекта, без Django и сторонних пакетов."""
+    frames = [
+        f'{os.path.relpath(frame.filename, settings.BASE_DIR)}:'
+        f'{frame.lineno} {frame.name}'
+        for frame in traceback.extract_stack()[:-2]
+        if frame.filename.startswith(settings.BASE_DIR)
+        and 'site-packages' not in frame.filename
+        and not frame.filename.startswith(os.path.dirname(__file__))
+    ]
+    return frames[-STACK_LIMIT:]
+
+
+class QueryInspector:
+    """Обертка курсора: медленные запросы и повторы одной формы."""
+
+    def __init__(self):
+        self.total = 0
+        self.shapes = Counter()
+        self.samples = {}
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.startswith(TRANSACTION):
+            return execute(sql, params, many, context)
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = perf_counter() - started
+            self.total += 1
+            shape = normalize(sql)
+            self.shapes[shape] += 1
+            if duration * 1000 >= settings.SLOW_QUERY_MS:
+                self.slow.append((shape, duration, project_stack()))
+            elif self.shapes[shape] == settings.N_PLUS_ONE_THRESHOLD:
+                self.samples[shape] = project_stack()
+
+    def repeated(self):
+        return {
+            shape: (count, self.samples.get(shape, []))
+            for shape, count in self.shapes.items()
+            if count >= settings.N_PLUS_ONE_THRESHOLD
+        }
+
+
+class QueryRegistry:
+    """Медленные и повторяющиеся запросы по view и отпечатку запроса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def record(self, view, kind, shape, count=1, duration=0.0):
+        key = (view, kind, fingerprint(shape))
+        with self.lock:
+            entry = self.entries.setdefault(key, {
+                'sql': shape, 'queries': 0, 'duration': 0.0,
+            })
+            entry['queries'] += count
+            entry['duration'] += duration
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def render(self):
+        with self.lock:
+            entries = sorted(self.entries.items())
+        metrics = (
+            ('yatube_slow_queries_total', 'Медленные запросы',
+             'slow', 'queries'),
+            ('yatube_slow_queries_seconds_total',
+             'Время медленных запросов', 'slow', 'duration'),
+            ('yatube_repeated_queries_total',
+             'Запросы одной формы сверх порога N+1', 'repeated', 'queries'),
+        )
+        lines = []
+        for metric, description, kind, field in metrics:
+            lines.append(f'# HELP {metric} {description}')
+            lines.append(f'# TYPE {metric} counter')
+            for (view, entry_kind, digest), entry in entries:
+                if entry_kind == kind:
+                    lines.append(
+                        f'{metric}{{view="{view}",fingerprint="{digest}"}} '
+                        f'{entry[field]}'
+                    )
+        return '\n'.join(lines) + '\n'
+
+
+registry = QueryRegistry()
+
+
+class QueryInspectorMiddleware:
+    """Журнал медленных запросов, детектор N+1 и бюджет запросов view.
+
+    Проверяется доля QUERY_INSPECTION_RATE запросов. Превышение бюджета
+    из QUERY_BUDGETS пишется в лог, а при QUERY_BUDGET_STRICT (в тестах)
+    роняет запрос с QueryBudgetExceeded.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = settings.QUERY_INSPECTION_RATE
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+        inspector = QueryInspector()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(inspector))
+            response = self.get_response(request)
+        self.report(view_name(request), inspector)
+        return response
+
+    def report(self, view, inspector):
+        for shape, duration, frames in inspector.slow:
+            registry.record(view, 'slow', shape, duration=duration)
+            logger.warning(json.dumps({
+                'event': 'slow_query',
+                'view': view,
+                'fingerprint': fingerprint(shape),
+                'duration_ms': round(duration * 1000, 2),
+                'sql': shape,
+                'stack': frames,
+            }, ensure_ascii=False))
+        for shape, (count, frames) in inspector.repeated().items():
+            registry.record(view, 'repeated', shape, count=count)
+            logger.warning(json.dumps({
+                'event': 'n_plus_one',
+                'view': view,
+                'fingerprint': fingerprint(shape),
+                'count': count,
+                'sql': shape,
+                'stack': frames,
+            }, ensure_ascii=False))
+        budget = settings.QUERY_BUDGETS.get(view)
+        if budget is None or inspector.total <= budget:
+            return
+        message = (
+            f'{view}: {inspector.total} запросов к БД при бюджете {budget}'
+        )
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
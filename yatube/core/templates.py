@@ -0,0 +1,54 @@
+import os
+
+from django.template import TemplateSyntaxError, engines
+from django.template.loaders.cached import Loader as CachedLoader
+
+
+def engine():
+    return engines['django'].engine
+
+
+def template_names():
+    """Имена всех шаблонов из каталогов TEMPLATES['DIRS']."""
+    for directory in engine().dirs:
+        for root, dirs, files in os.walk(directory):
+            for name in sorted(files):
+                if name.endswith('.html'):
+                    path = os.path.relpath(os.path.join(root, name), directory)
+                    yield path.replace(os.sep, '/')
+
+
+def warm():
+    """Разбирает все шаблоны проекта заранее.
+
+    С кэширующим загрузчиком первый запрос к странице уже не читает и не
+    разбирает шаблоны. Возвращает число шаблонов и ошибки разбора.
+    """
+    count = 0
+    errors = {}
+    for name in template_names():
+        try:
+            engine().get_template(name)
+        except TemplateSyntaxError as error:
+            errors[name] = error
+        count += 1
+    return count, errors
+
+
+def reset():
+    """Сбрасывает кэш разобранных шаблонов у кэширующих загрузчиков."""
+    for loader in engine().template_loaders:
+        if isinstance(loader, CachedLoader):
+            loader.reset()
+
+
+def use_cached_loader():
+    """Включает кэширующий загрузчик, если его нет в настройках."""
+    template_engine = engine()
+    if any(isinstance(loader, CachedLoader)
+           for loader in template_engine.template_loaders):
+        return
+    template_engine.loaders = [
+        ('django.template.loaders.cached.Loader', template_engine.loaders)
+    ]
+    template_engine.__dict__.pop('template_loaders', None)
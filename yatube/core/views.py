@@ -1,5 +1,11 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import render
 
+from . import metrics, queries
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +21,21 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+def has_metrics_token(request):
+    """Заголовок Authorization: Bearer с токеном METRICS_TOKEN."""
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and hmac.compare_digest(
+        header.encode(), f'Bearer {token}'.encode()
+    )
+
+
+def metrics_view(request):
+    if not request.user.is_staff and not has_metrics_token(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        metrics.registry.render() + queries.registry.render(),
+        content_type='text/plain; version=0.0.4',
+    )
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Post, Group, Comment, Follow
+from . import search
+from .models import Post, Group, Comment, Follow, UserStats
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -10,8 +11,15 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        found = [pk for pk, score in search.find(search_term)]
+        return queryset.filter(pk__in=found), False
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
 admin.site.register(Comment)
 admin.site.register(Follow)
+admin.site.register(UserStats)
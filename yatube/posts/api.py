@@ -0,0 +1,136 @@
+from django.http import JsonResponse
+from django.views.decorators.http import require_safe
+
+from .models import Post
+from .views import (
+    author_id_by_username, author_scopes, cached_group, cached_page,
+    comment_scopes, conditional, feed_scopes, group_scopes, load_comments,
+    load_post, post_scopes, search_page,
+)
+
+POST_FIELDS = {
+    'id': lambda post: post.pk,
+    'text': lambda post: post.text,
+    'pub_date': lambda post: post.pub_date.isoformat(),
+    'author': lambda post: post.author.username,
+    'group': lambda post: post.group.slug if post.group else None,
+    'image': lambda post: post.image.url if post.image else None,
+    'comments_count': lambda post: post.comments_count,
+}
+# Страницы списков кэшируются по версиям лент, а комментарий меняет только
+# версию самого поста, поэтому число комментариев отдается лишь в посте.
+LIST_FIELDS = {
+    name: serializer
+    for name, serializer in POST_FIELDS.items()
+    if name != 'comments_count'
+}
+COMMENT_FIELDS = {
+    'id': lambda comment: comment.pk,
+    'author': lambda comment: comment.author.username,
+    'text': lambda comment: comment.text,
+    'created': lambda comment: comment.created.isoformat(),
+}
+JSON_PARAMS = {'ensure_ascii': False, 'separators': (',', ':')}
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params=JSON_PARAMS)
+
+
+def selected_fields(request, serializers=POST_FIELDS):
+    fields = [
+        name.strip()
+        for name in request.GET.get('fields', '').split(',')
+        if name.strip()
+    ]
+    unknown = set(fields) - set(serializers)
+    if unknown:
+        raise ValueError(
+            'Неизвестные поля: ' + ', '.join(sorted(unknown))
+        )
+    return fields or list(serializers)
+
+
+def serialize(obj, serializers, fields=None):
+    return {
+        name: serializers[name](obj) for name in fields or serializers
+    }
+
+
+def posts_page(request, posts, *scopes):
+    try:
+        fields = selected_fields(request, LIST_FIELDS)
+    except ValueError as error:
+        return json_response({'errors': {'fields': [str(error)]}}, 400)
+    page_obj = cached_page(request, posts, *scopes)
+    return json_response({
+        'results': [
+            serialize(post, LIST_FIELDS, fields) for post in page_obj
+        ],
+        'number': page_obj.number,
+        'next_cursor': page_obj.next_cursor,
+        'previous_cursor': page_obj.previous_cursor,
+    })
+
+
+@conditional(feed_scopes)
+def posts_list(request):
+    return posts_page(request, Post.objects.with_related(), ('posts',))
+
+
+@conditional(group_scopes)
+def group_posts(request, slug):
+    group_id = cached_group(slug).pk
+    posts = Post.objects.with_related().filter(group_id=group_id)
+    return posts_page(request, posts, ('group', group_id))
+
+
+@conditional(author_scopes)
+def profile_posts(request, username):
+    author_id = author_id_by_username(username)
+    posts = Post.objects.with_related().filter(author_id=author_id)
+    return posts_page(request, posts, ('author', author_id))
+
+
+@conditional(post_scopes)
+def post_detail(request, post_id):
+    try:
+        fields = selected_fields(request)
+    except ValueError as error:
+        return json_response({'errors': {'fields': [str(error)]}}, 400)
+    post = load_post(post_id)
+    data = serialize(post, POST_FIELDS, fields)
+    comments = load_comments(post)
+    data['comments'] = [
+        serialize(comment, COMMENT_FIELDS) for comment in comments
+    ]
+    data['comments_next_cursor'] = comments.next_cursor
+    return json_response(data)
+
+
+@conditional(comment_scopes)
+def post_comments(request, post_id):
+    comments = load_comments(load_post(post_id), request.GET.get('cursor'))
+    return json_response({
+        'results': [
+            serialize(comment, COMMENT_FIELDS) for comment in comments
+        ],
+        'next_cursor': comments.next_cursor,
+    })
+
+
+@require_safe
+def search(request):
+    form, page_obj = search_page(request)
+    if page_obj is None:
+        return json_response({'errors': form.errors}, 400)
+    results = []
+    for post in page_obj:
+        result = serialize(post, POST_FIELDS)
+        result['score'] = post.search_score
+        results.append(result)
+    return json_response({
+        'results': results,
+        'number': page_obj.number,
+        'next_cursor': page_obj.next_cursor,
+    })
@@ -0,0 +1,102 @@
+from collections import Counter, defaultdict
+
+from django.db import connection, transaction
+
+from . import feeds, search
+from .caching import bump
+from .models import Comment, Post
+from .signals import (
+    change_counter, change_group_counter, change_user_counter,
+)
+
+
+def create_posts(posts):
+    """bulk_create постов вместе с тем, что делают их сигналы.
+
+    Заданная у поста pub_date сохраняется, хотя auto_now_add при вставке
+    ее перезаписывает.
+    """
+    dates = [post.pub_date for post in posts]
+    with transaction.atomic():
+        Post.objects.bulk_create(posts)
+        fetch_ids(Post, posts, 'pub_date', 'author_id', 'text')
+        restore_dates(posts, dates)
+        authors = Counter(post.author_id for post in posts)
+        groups = Counter(post.group_id for post in posts if post.group_id)
+        for author_id, count in authors.items():
+            change_user_counter(author_id, 'posts_count', count)
+        for group_id, count in groups.items():
+            change_group_counter(group_id, count)
+        feeds.fan_out_many(posts)
+        search.index_posts(posts)
+        bump(
+            ('posts',),
+            *[('author', author_id) for author_id in authors],
+            *[('group', group_id) for group_id in groups],
+        )
+    return posts
+
+
+def create_comments(comments):
+    """bulk_create комментариев со счетчиками и сбросом кэша постов.
+
+    Как и у постов, заданная дата created сохраняется.
+    """
+    dates = [comment.created for comment in comments]
+    with transaction.atomic():
+        Comment.objects.bulk_create(comments)
+        fetch_ids(
+            Comment, comments, 'created', 'post_id', 'author_id', 'text'
+        )
+        restore_dates(comments, dates, Comment, 'created')
+        posts = Counter(comment.post_id for comment in comments)
+        for post_id, count in posts.items():
+            change_counter(
+                Post.objects.filter(pk=post_id), 'comments_count', count
+            )
+        bump(*[('post', post_id) for post_id in posts])
+    return comments
+
+
+def fetch_ids(model, objects, date_field, *fields):
+    """Проставляет id после bulk_create, если база их не вернула (SQLite).
+
+    Id ищутся по естественному ключу: дате auto_now_add, которую
+    bulk_create записал и в объекты, и полям fields. Одинаковые по ключу
+    объекты взаимозаменяемы и получают id по порядку.
+    """
+    if not objects or connection.features.can_return_ids_from_bulk_insert:
+        return
+    key_fields = (date_field, *fields)
+    waiting = defaultdict(list)
+    for obj in objects:
+        waiting[tuple(getattr(obj, name) for name in key_fields)].append(obj)
+    dates = [getattr(obj, date_field) for obj in objects]
+    rows = model.objects.filter(**{
+        f'{date_field}__range': (min(dates), max(dates)),
+    }).order_by('pk').values_list('pk', *key_fields)
+    for pk, *key in rows.iterator():
+        matches = waiting.get(tuple(key))
+        if matches:
+            matches.pop(0).pk = pk
+
+
+def restore_dates(objects, dates, model=Post, name='pub_date'):
+    field = model._meta.get_field(name)
+    dated = []
+    for obj, date in zip(objects, dates):
+        if date is not None:
+            setattr(obj, name, date)
+            dated.append(obj)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'UPDATE {model._meta.db_table} SET {field.column} = %s '
+            f'WHERE {model._meta.pk.column} = %s',
+            [
+                [
+                    field.get_db_prep_value(getattr(obj, name), connection),
+                    obj.pk,
+                ]
+                for obj in dated
+            ],
+        )
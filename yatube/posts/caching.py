@@ -0,0 +1,148 @@
+import math
+import random
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from core.metrics import record_cache
+
+LOCK_WAIT = 0.05
+LOCK_ATTEMPTS = 20
+
+_local_values = {}
+
+
+def version_key(scope):
+    return ':'.join(['version', *map(str, scope)])
+
+
+def versions(*scopes):
+    """Текущие версии областей кэша, например ('post', 1)."""
+    keys = [version_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            cache.add(key, time.time_ns(), None)
+        found.update(cache.get_many(missing))
+    return [found.get(key, 0) for key in keys]
+
+
+def bump(*scopes):
+    """Сбрасывает области кэша сразу и еще раз после коммита транзакции."""
+    increment(scopes)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: increment(scopes))
+
+
+def bump_post(post, *group_ids):
+    bump(
+        ('posts',),
+        ('post', post.pk),
+        ('author', post.author_id),
+        *[('group', group_id) for group_id in group_ids if group_id],
+    )
+
+
+def increment(scopes):
+    """Новая версия — время изменения в наносекундах, больше прежней."""
+    keys = [version_key(scope) for scope in scopes]
+    now = time.time_ns()
+    saved = cache.get_many(keys)
+    cache.set_many(
+        {key: max(now, saved.get(key, 0) + 1) for key in keys}, None
+    )
+
+
+def last_modified(*scopes):
+    """Время последнего изменения областей по их версиям.
+
+    Last-Modified точен до секунды, поэтому это начало секунды, следующей
+    за изменением. Пока она не наступила, правка в ту же секунду не
+    сдвинула бы дату, и клиент с If-Modified-Since получил бы устаревший
+    304, так что в это время дата не отдается (None).
+    """
+    second = max(versions(*scopes)) // 10 ** 9 + 1
+    if second > time.time():
+        return None
+    return datetime.fromtimestamp(second, timezone.utc)
+
+
+def get_or_set(key, compute, timeout=None, beta=1.0):
+    """cache.get_or_set с защитой от одновременного пересчета.
+
+    Значение пересчитывается чуть раньше срока с вероятностью, растущей
+    к концу жизни записи (XFetch), а пересчитывает его только держатель
+    блокировки; остальные отдают старое значение или ждут новое.
+    """
+    timeout = timeout or settings.POSTS_CACHE_TIMEOUT
+    lock_key = f'lock:{key}'
+    entry = cache.get(key)
+    record_cache(entry is not None)
+    if entry is not None:
+        value, expires, delta = entry
+        early = delta * beta * math.log(1 - random.random())
+        if time.time() - early < expires:
+            return value
+        if not cache.add(lock_key, 1, settings.CACHE_LOCK_TIMEOUT):
+            return value
+        return recompute(key, compute, timeout, lock_key)
+    if not cache.add(lock_key, 1, settings.CACHE_LOCK_TIMEOUT):
+        for _ in range(LOCK_ATTEMPTS):
+            time.sleep(LOCK_WAIT)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+        return recompute(key, compute, timeout)
+    return recompute(key, compute, timeout, lock_key)
+
+
+def recompute(key, compute, timeout, lock_key=None):
+    try:
+        started = time.monotonic()
+        value = compute()
+        delta = time.monotonic() - started
+        cache.set(key, (value, time.time() + timeout, delta), timeout)
+    finally:
+        if lock_key is not None:
+            cache.delete(lock_key)
+    return value
+
+
+def remember(name, scopes, compute, *parts, timeout=None):
+    """Значение из кэша, пока не изменилась ни одна из версий scopes."""
+    key = ':'.join(map(str, [
+        name, *map(version_key, scopes), *versions(*scopes), *parts
+    ]))
+    return get_or_set(key, compute, timeout)
+
+
+def remember_local(name, scopes, compute, *parts):
+    """remember с копией значения в памяти процесса.
+
+    Версии scopes по-прежнему сверяются с общим кэшем, так что изменение
+    в любом процессе видно во всех, но при неизменных версиях значение
+    не читается из кэша и не распаковывается заново.
+    """
+    current = versions(*scopes)
+    key = (name, *parts)
+    entry = _local_values.get(key)
+    if entry is not None and entry[0] == current:
+        record_cache(True)
+        return entry[1]
+    value = remember(name, scopes, compute, *parts)
+    _local_values[key] = (current, value)
+    return value
+
+
+def attach_versions(posts):
+    """Проставляет постам версии для ключей кэша их карточек."""
+    posts = list(posts)
+    for post, version in zip(posts, versions(
+        *[('post', post.pk) for post in posts]
+    )):
+        post.cache_version = version
+    return posts
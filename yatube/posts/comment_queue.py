@@ -0,0 +1,245 @@
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .bulk import create_comments
+from .models import Comment, Post, User
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS comments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    post_id INTEGER NOT NULL,
+    author_id INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    created TEXT NOT NULL,
+    claimed_by TEXT,
+    claimed_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS comments_pending_idx
+    ON comments (post_id, author_id);
+CREATE TABLE IF NOT EXISTS failed_comments (
+    id INTEGER PRIMARY KEY,
+    post_id INTEGER NOT NULL,
+    author_id INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    created TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    error TEXT NOT NULL,
+    failed_at TEXT NOT NULL
+);
+'''
+
+_local = threading.local()
+_writer = None
+_lock = threading.Lock()
+
+
+class QueueFull(Exception):
+    """Очередь длиннее COMMENT_QUEUE_MAX_DEPTH."""
+
+
+def journal():
+    """Соединение этого потока с журналом очереди.
+
+    Журнал — отдельный файл SQLite, поэтому запись в него не ждет
+    блокировку основной базы.
+    """
+    path = settings.COMMENT_QUEUE_PATH
+    db = getattr(_local, 'journal', None)
+    if db is None or _local.path != path:
+        db = sqlite3.connect(path, timeout=10, isolation_level=None)
+        db.execute('PRAGMA journal_mode = WAL')
+        db.execute('PRAGMA synchronous = NORMAL')
+        db.executescript(SCHEMA)
+        _local.journal, _local.path = db, path
+    return db
+
+
+def enqueue(post_id, author_id, text):
+    """Дописывает комментарий в журнал или бросает QueueFull."""
+    db = journal()
+    db.execute('BEGIN IMMEDIATE')
+    try:
+        depth, = db.execute('SELECT count(*) FROM comments').fetchone()
+        if depth >= settings.COMMENT_QUEUE_MAX_DEPTH:
+            raise QueueFull(depth)
+        db.execute(
+            'INSERT INTO comments (post_id, author_id, text, created) '
+            'VALUES (?, ?, ?, ?)',
+            [post_id, author_id, text, timezone.now().isoformat()],
+        )
+    except BaseException:
+        db.execute('ROLLBACK')
+        raise
+    db.execute('COMMIT')
+    start()
+
+
+def depth():
+    return journal().execute('SELECT count(*) FROM comments').fetchone()[0]
+
+
+def pending(post_id, author):
+    """Еще не записанные в базу комментарии author к посту."""
+    rows = journal().execute(
+        'SELECT text, created FROM comments '
+        'WHERE post_id = ? AND author_id = ? ORDER BY id',
+        [post_id, author.pk],
+    )
+    return [
+        Comment(
+            post_id=post_id, author=author, text=text,
+            created=datetime.fromisoformat(created),
+        )
+        for text, created in rows
+    ]
+
+
+def claim(limit):
+    """Забирает пачку записей; чужие зависшие захваты переходят к нам."""
+    token = uuid.uuid4().hex
+    now = time.time()
+    db = journal()
+    db.execute(
+        'UPDATE comments SET claimed_by = ?, claimed_at = ?, '
+        'attempts = attempts + 1 WHERE id IN ('
+        'SELECT id FROM comments WHERE claimed_by IS NULL '
+        'OR claimed_at < ? ORDER BY id LIMIT ?)',
+        [token, now, now - settings.COMMENT_QUEUE_CLAIM_TIMEOUT, limit],
+    )
+    rows = db.execute(
+        'SELECT id, post_id, author_id, text, created, attempts '
+        'FROM comments WHERE claimed_by = ? ORDER BY id',
+        [token],
+    ).fetchall()
+    return token, rows
+
+
+def flush(limit=None):
+    """Переносит пачку комментариев из журнала в базу одной транзакцией.
+
+    Записи к удаленным постам и от удаленных авторов отбрасываются.
+    Если процесс упал между коммитом в базу и удалением из журнала,
+    записи заберут повторно, и уже сохраненные комментарии пропустятся.
+    Пачку, которую не удалось записать COMMENT_QUEUE_MAX_ATTEMPTS раз,
+    пишем по одной записи, а не записанные уходят в failed_comments.
+    Возвращает число обработанных записей.
+    """
+    token, rows = claim(limit or settings.COMMENT_QUEUE_BATCH_SIZE)
+    if not rows:
+        return 0
+    if max(row[5] for row in rows) < settings.COMMENT_QUEUE_MAX_ATTEMPTS:
+        save(rows)
+    else:
+        for row in rows:
+            try:
+                save([row])
+            except Exception as error:
+                bury(row, error)
+    journal().execute('DELETE FROM comments WHERE claimed_by = ?', [token])
+    return len(rows)
+
+
+def save(rows):
+    post_ids = {row[1] for row in rows}
+    posts = set(
+        Post.objects.filter(pk__in=post_ids).values_list('pk', flat=True)
+    )
+    authors = set(
+        User.objects.filter(
+            pk__in={row[2] for row in rows}
+        ).values_list('pk', flat=True)
+    )
+    comments = [
+        Comment(
+            post_id=post_id, author_id=author_id, text=text,
+            created=datetime.fromisoformat(created),
+        )
+        for _, post_id, author_id, text, created, _ in rows
+        if post_id in posts and author_id in authors
+    ]
+    if any(row[5] > 1 for row in rows):
+        comments = unsaved(comments)
+    create_comments(comments)
+
+
+def bury(row, error):
+    """Переносит запись, которую не удается записать, в failed_comments."""
+    logger.error(
+        'Комментарий %s из очереди не записан за %s попыток: %r',
+        row[0], row[5], error,
+    )
+    db = journal()
+    db.execute('BEGIN IMMEDIATE')
+    db.execute(
+        'INSERT OR REPLACE INTO failed_comments (id, post_id, author_id, '
+        'text, created, attempts, error, failed_at) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+        [*row, repr(error), timezone.now().isoformat()],
+    )
+    db.execute('DELETE FROM comments WHERE id = ?', [row[0]])
+    db.execute('COMMIT')
+
+
+def unsaved(comments):
+    """Комментарии, которых еще нет в базе."""
+    if not comments:
+        return comments
+    saved = set(
+        Comment.objects.filter(
+            post_id__in={comment.post_id for comment in comments},
+            created__gte=min(comment.created for comment in comments),
+        ).values_list('post_id', 'author_id', 'created')
+    )
+    return [
+        comment for comment in comments
+        if (comment.post_id, comment.author_id, comment.created) not in saved
+    ]
+
+
+def drain():
+    """Переносит в базу всю очередь; возвращает число записей."""
+    total = 0
+    while True:
+        count = flush()
+        if not count:
+            return total
+        total += count
+
+
+def write_behind():
+    while True:
+        try:
+            if not flush():
+                time.sleep(settings.COMMENT_QUEUE_INTERVAL)
+        except Exception:
+            logger.exception('Не удалось записать очередь комментариев')
+            connection.close()
+            time.sleep(settings.COMMENT_QUEUE_INTERVAL)
+
+
+def start():
+    """Запускает фоновый писатель процесса, если фоновые задачи включены.
+
+    После fork (например, gunicorn --preload) поток родителя в дочернем
+    процессе мертв, и писатель запускается заново.
+    """
+    global _writer
+    if not settings.BACKGROUND_WORKERS:
+        return
+    with _lock:
+        if _writer is None or not _writer.is_alive():
+            _writer = threading.Thread(
+                target=write_behind, name='yatube-comments', daemon=True
+            )
+            _writer.start()
@@ -0,0 +1,100 @@
+import csv
+import io
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment, Follow, Group, Post
+
+TABLES = {
+    'groups': (Group, ('id', 'title', 'slug', 'description'), None),
+    'posts': (
+        Post,
+        ('id', 'text', 'pub_date', 'author_id', 'group_id', 'image'),
+        'pub_date',
+    ),
+    'comments': (
+        Comment,
+        ('id', 'post_id', 'author_id', 'text', 'created'),
+        'created',
+    ),
+    'follows': (Follow, ('id', 'user_id', 'author_id'), None),
+}
+FORMATS = ('jsonl', 'csv')
+CHUNK_SIZE = 2000
+
+
+def parse_since(value):
+    """Дата начала инкрементальной выгрузки; ValueError, если она неверна."""
+    since = parse_datetime(value)
+    if since is None:
+        raise ValueError(f'Неверная дата: {value}')
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def scan(table, since=None, after_id=None, chunk_size=CHUNK_SIZE):
+    """Строки таблицы по возрастанию id, пачками по ключу id.
+
+    В памяти одновременно держится не больше chunk_size строк.
+    """
+    model, fields, date_field = TABLES[table]
+    queryset = model.objects.order_by('pk')
+    if since is not None and date_field is not None:
+        queryset = queryset.filter(**{f'{date_field}__gte': since})
+    last_id = after_id or 0
+    while True:
+        chunk = list(
+            queryset.filter(pk__gt=last_id).values(*fields)[:chunk_size]
+        )
+        if not chunk:
+            return
+        yield from chunk
+        last_id = chunk[-1]['id']
+
+
+def encode(rows, fields, file_format):
+    """Текстовые строки JSONL или CSV (с заголовком) для rows."""
+    if file_format == 'jsonl':
+        for row in rows:
+            yield json.dumps(
+                row, cls=DjangoJSONEncoder, ensure_ascii=False
+            ) + '\n'
+        return
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fields)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({
+            name: value.isoformat() if hasattr(value, 'isoformat') else value
+            for name, value in row.items()
+        })
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export(table, file_format='jsonl', since=None, after_id=None):
+    fields = TABLES[table][1]
+    return encode(scan(table, since, after_id), fields, file_format)
+
+
+def gzip_stream(lines, flush_size=64 * 1024):
+    """Сжимает поток строк в gzip, отдавая готовые куски по мере роста."""
+    compressor = zlib.compressobj(wbits=31)
+    pending = []
+    size = 0
+    for line in lines:
+        pending.append(line.encode())
+        size += len(pending[-1])
+        if size >= flush_size:
+            chunk = compressor.compress(b''.join(pending))
+            pending, size = [], 0
+            if chunk:
+                yield chunk
+    yield compressor.compress(b''.join(pending)) + compressor.flush()
@@ -0,0 +1,127 @@
+from collections import defaultdict
+
+from django.conf import settings
+
+from .models import FeedItem, Follow, Post, UserStats
+from .paginators import FeedPaginator
+
+
+def followers_count(author_id):
+    count = UserStats.objects.filter(user_id=author_id).values_list(
+        'followers_count', flat=True
+    ).first()
+    return count or 0
+
+
+def is_popular(author_id):
+    """Посты популярных авторов читаются напрямую, без раскладки."""
+    return followers_count(author_id) > settings.FEED_FANOUT_LIMIT
+
+
+def fan_out(post):
+    fan_out_many([post])
+
+
+def fan_out_many(posts):
+    """Раскладывает посты по лентам подписчиков их авторов."""
+    authors = {post.author_id for post in posts}
+    popular = set(UserStats.objects.filter(
+        user_id__in=authors,
+        followers_count__gt=settings.FEED_FANOUT_LIMIT,
+    ).values_list('user_id', flat=True))
+    followers = defaultdict(list)
+    for author_id, user_id in Follow.objects.filter(
+        author_id__in=authors - popular
+    ).values_list('author_id', 'user_id').iterator():
+        followers[author_id].append(user_id)
+    if not followers:
+        return
+    FeedItem.objects.bulk_create(
+        [
+            FeedItem(
+                user_id=user_id,
+                post=post,
+                author_id=post.author_id,
+                pub_date=post.pub_date,
+            )
+            for post in posts
+            for user_id in followers[post.author_id]
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+def backfill(follow):
+    if follow.user_id is None or is_popular(follow.author_id):
+        return
+    posts = Post.objects.filter(author_id=follow.author_id).order_by(
+        '-pub_date', '-pk'
+    ).values_list('pk', 'pub_date')[:settings.FEED_BACKFILL_SIZE]
+    FeedItem.objects.bulk_create(
+        [
+            FeedItem(
+                user_id=follow.user_id,
+                post_id=post_id,
+                author_id=follow.author_id,
+                pub_date=pub_date,
+            )
+            for post_id, pub_date in posts
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def backfill_followers(author_id):
+    """Заполняет ленты подписчиков автора, переставшего быть популярным.
+
+    Пока подписчиков было больше FEED_FANOUT_LIMIT, его посты не
+    раскладывались, а новым подписчикам ленту не заполняли.
+    """
+    if followers_count(author_id) != settings.FEED_FANOUT_LIMIT:
+        return
+    posts = list(Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-pk'
+    ).values_list('pk', 'pub_date')[:settings.FEED_BACKFILL_SIZE])
+    if not posts:
+        return
+    followers = list(Follow.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True))
+    # Записи создаются частями, чтобы не держать в памяти все ленты сразу.
+    step = max(1, 5000 // len(posts))
+    for start in range(0, len(followers), step):
+        FeedItem.objects.bulk_create(
+            [
+                FeedItem(
+                    user_id=user_id,
+                    post_id=post_id,
+                    author_id=author_id,
+                    pub_date=pub_date,
+                )
+                for user_id in followers[start:start + step]
+                for post_id, pub_date in posts
+            ],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+
+
+def trim(follow):
+    FeedItem.objects.filter(
+        user_id=follow.user_id, author_id=follow.author_id
+    ).delete()
+
+
+def follow_feed_paginator(user, per_page):
+    items = FeedItem.objects.filter(user=user).select_related(
+        'post__author', 'post__group'
+    ).order_by('-pub_date', '-post_id')
+    popular = list(Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gt=settings.FEED_FANOUT_LIMIT,
+    ).values_list('author_id', flat=True))
+    extra_posts = None
+    if popular:
+        extra_posts = Post.objects.with_related().filter(author__in=popular)
+    return FeedPaginator(items, per_page, extra_posts=extra_posts)
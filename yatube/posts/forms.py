@@ -1,9 +1,22 @@
 from django import forms
 
-from .models import Post, Comment
+from .models import Comment, Group, Post, User
 
 
 class PostForm(forms.ModelForm):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        image = self.files.get('image')
+        self.upload_error = getattr(image, 'upload_error', None)
+        if self.upload_error:
+            self.files = self.files.copy()
+            del self.files['image']
+
+    def clean_image(self):
+        if self.upload_error:
+            raise forms.ValidationError(self.upload_error)
+        return self.cleaned_data['image']
+
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
@@ -27,3 +40,20 @@ class CommentForm(forms.ModelForm):
         help_texts = {
             'text': 'Введите текст комментария',
         }
+
+
+class SearchForm(forms.Form):
+    q = forms.CharField(label='Что ищем', max_length=200)
+    group = forms.ModelChoiceField(
+        Group.objects.all(),
+        label='Группа',
+        required=False,
+        to_field_name='slug',
+    )
+    author = forms.ModelChoiceField(
+        User.objects.all(),
+        label='Автор',
+        required=False,
+        to_field_name='username',
+        widget=forms.TextInput,
+    )
@@ -0,0 +1,264 @@
+import json
+import math
+import platform
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+READ_SCENARIOS = ('index', 'group_posts', 'profile', 'post_detail')
+SCENARIOS = READ_SCENARIOS + ('follow_index', 'post_create', 'add_comment')
+SAMPLE_SIZE = 1000
+
+
+def percentile(values, share):
+    """Процентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0
+    rank = max(math.ceil(share * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(timings, queries, errors, elapsed):
+    return {
+        'requests': len(timings),
+        'errors': errors,
+        'p50_ms': round(percentile(timings, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(timings, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 2),
+        'queries_mean': (
+            round(sum(queries) / len(queries), 2) if queries else None
+        ),
+        'queries_max': max(queries) if queries else None,
+        'rps': round(len(timings) / elapsed, 1) if elapsed else 0,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочный прогон страниц постов: задержки, запросы, RPS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument(
+            '--scenarios', default=','.join(SCENARIOS),
+            help='Через запятую: ' + ', '.join(SCENARIOS),
+        )
+        parser.add_argument(
+            '--clients', type=int, default=20,
+            help='Сколько разных пользователей ходят на страницы с входом',
+        )
+        parser.add_argument(
+            '--host', default='localhost',
+            help='Заголовок Host для тестового клиента',
+        )
+        parser.add_argument(
+            '--server',
+            help='Адрес запущенного сервера; только страницы для гостей',
+        )
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--clear-cache', action='store_true')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для результатов в JSON')
+        parser.add_argument(
+            '--baseline', help='Прошлые результаты для сравнения'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=1.2,
+            help='Во сколько раз можно ухудшить p95 и число запросов',
+        )
+
+    def handle(self, *args, **options):
+        scenarios = [
+            name.strip() for name in options['scenarios'].split(',')
+        ]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f'Нет сценариев: {", ".join(unknown)}')
+        if options['server']:
+            scenarios = [name for name in scenarios if name in READ_SCENARIOS]
+        self.random = random.Random(options['seed'])
+        self.options = options
+        self.sample_data()
+        if options['clear_cache']:
+            cache.clear()
+        results = {}
+        for name in scenarios:
+            if options['server']:
+                results[name] = self.run_server(name)
+            else:
+                results[name] = self.run_client(name)
+            self.report(name, results[name])
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'mode': 'server' if options['server'] else 'client',
+                'requests': options['requests'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'posts': self.max_post_id,
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as target:
+                json.dump(report, target, indent=2, ensure_ascii=False)
+        if options['baseline']:
+            self.compare(results, options['baseline'])
+
+    def sample_data(self):
+        self.max_post_id = Post.objects.aggregate(Max('pk'))['pk__max'] or 0
+        if not self.max_post_id:
+            raise CommandError('Нет постов: сначала seed_benchmark')
+        post_ids = [
+            self.random.randint(1, self.max_post_id)
+            for _ in range(SAMPLE_SIZE)
+        ]
+        self.post_ids = list(
+            Post.objects.filter(pk__in=post_ids).values_list('pk', flat=True)
+        )
+        self.usernames = list(User.objects.filter(
+            posts__pk__in=self.post_ids
+        ).values_list('username', flat=True).distinct())
+        self.slugs = list(Group.objects.values_list('slug', flat=True))
+        readers = list(
+            Follow.objects.values_list('user_id', flat=True)
+            .distinct()[:SAMPLE_SIZE]
+        )
+        self.readers = User.objects.filter(pk__in=self.random.sample(
+            readers, min(self.options['clients'], len(readers))
+        ))
+
+    def request_for(self, name):
+        """(метод, адрес, данные) очередного запроса сценария."""
+        if name == 'index':
+            page = self.random.choice([1, 1, 1, 2, 3])
+            return 'get', reverse('posts:index') + f'?page={page}', None
+        if name == 'group_posts':
+            slug = self.random.choice(self.slugs)
+            return 'get', reverse('posts:group_list', args=[slug]), None
+        if name == 'profile':
+            username = self.random.choice(self.usernames)
+            return 'get', reverse('posts:profile', args=[username]), None
+        if name == 'post_detail':
+            post_id = self.random.choice(self.post_ids)
+            return 'get', reverse('posts:post_detail', args=[post_id]), None
+        if name == 'follow_index':
+            return 'get', reverse('posts:follow_index'), None
+        if name == 'post_create':
+            text = f'Нагрузочный пост {self.random.random()}'
+            return 'post', reverse('posts:post_create'), {'text': text}
+        post_id = self.random.choice(self.post_ids)
+        return 'post', reverse('posts:add_comment', args=[post_id]), {
+            'text': 'Нагрузочный комментарий'
+        }
+
+    def clients(self, name):
+        if name in READ_SCENARIOS:
+            return [Client(HTTP_HOST=self.options['host'])]
+        clients = []
+        for reader in self.readers:
+            client = Client(HTTP_HOST=self.options['host'])
+            client.force_login(reader)
+            clients.append(client)
+        if not clients:
+            raise CommandError('Нет подписок: сначала seed_benchmark')
+        return clients
+
+    def run_client(self, name):
+        clients = self.clients(name)
+        for _ in range(self.options['warmup']):
+            method, url, data = self.request_for(name)
+            getattr(self.random.choice(clients), method)(url, data)
+        timings, queries, errors = [], [], 0
+        started = time.perf_counter()
+        for _ in range(self.options['requests']):
+            method, url, data = self.request_for(name)
+            client = self.random.choice(clients)
+            with CaptureQueriesContext(connection) as captured:
+                begin = time.perf_counter()
+                response = getattr(client, method)(url, data)
+                timings.append(time.perf_counter() - begin)
+            queries.append(len(captured))
+            errors += response.status_code >= 500
+        return summarize(
+            timings, queries, errors, time.perf_counter() - started
+        )
+
+    def fetch(self, url):
+        begin = time.perf_counter()
+        try:
+            with urlopen(self.options['server'].rstrip('/') + url) as reply:
+                reply.read()
+                failed = False
+        except HTTPError as error:
+            failed = error.code >= 500
+        return time.perf_counter() - begin, failed
+
+    def run_server(self, name):
+        urls = [
+            self.request_for(name)[1]
+            for _ in range(self.options['warmup'] + self.options['requests'])
+        ]
+        with ThreadPoolExecutor(self.options['concurrency']) as executor:
+            list(executor.map(self.fetch, urls[:self.options['warmup']]))
+            started = time.perf_counter()
+            replies = list(
+                executor.map(self.fetch, urls[self.options['warmup']:])
+            )
+        timings = [timing for timing, failed in replies]
+        errors = sum(failed for timing, failed in replies)
+        return summarize(
+            timings, [], errors, time.perf_counter() - started
+        )
+
+    def report(self, name, result):
+        queries = result['queries_mean']
+        self.stdout.write(
+            f'{name:<13} p50 {result["p50_ms"]:>8.2f} мс  '
+            f'p95 {result["p95_ms"]:>8.2f} мс  '
+            f'p99 {result["p99_ms"]:>8.2f} мс  '
+            f'{result["rps"]:>8.1f} rps  '
+            f'запросов к БД {"-" if queries is None else queries}  '
+            f'ошибок {result["errors"]}'
+        )
+
+    def compare(self, results, path):
+        with open(path) as source:
+            baseline = json.load(source)['results']
+        tolerance = self.options['tolerance']
+        regressions = []
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            for metric in ('p95_ms', 'queries_mean'):
+                old, new = before.get(metric), result.get(metric)
+                if old is not None and new is not None and (
+                    new > old * tolerance and new - old > 0.5
+                ):
+                    regressions.append(f'{name} {metric}: {old} → {new}')
+        if regressions:
+            raise CommandError(
+                'Регрессии относительно базового прогона:\n'
+                + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
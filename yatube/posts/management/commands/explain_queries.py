@@ -0,0 +1,98 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+
+from posts.models import Comment, FeedItem, Follow, Post
+
+INDEXED_MODELS = (Post, Comment, FeedItem)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает планы и время горячих запросов с индексами '
+        'и без них'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+        queries = self.hot_queries()
+        if not queries:
+            self.stdout.write('В базе нет постов для замеров')
+            return
+        try:
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    for model in INDEXED_MODELS:
+                        for index in model._meta.indexes:
+                            name = connection.ops.quote_name(index.name)
+                            cursor.execute(f'DROP INDEX {name}')
+                before = self.measure(queries)
+                raise Rollback
+        except Rollback:
+            pass
+        # sqlite3 кэширует подготовленные запросы вместе с планом.
+        connection.close()
+        after = self.measure(queries)
+        for name in queries:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            for label, results in (('до', before), ('после', after)):
+                plan, elapsed = results[name]
+                self.stdout.write(f'  {label}: {elapsed * 1000:.3f} мс')
+                for line in plan.splitlines():
+                    self.stdout.write(f'    {line}')
+
+    def hot_queries(self):
+        post = Post.objects.order_by('-pub_date').first()
+        if post is None:
+            return {}
+        author_id = Post.objects.values('author').annotate(
+            total=Count('pk')
+        ).order_by('-total').values_list('author', flat=True).first()
+        group_id = Post.objects.exclude(group=None).values_list(
+            'group', flat=True
+        ).first()
+        follow = Follow.objects.first()
+        queries = {
+            'index': Post.objects.with_related().order_by(
+                '-pub_date', '-pk'
+            )[:11],
+            'profile': Post.objects.with_related().filter(
+                author_id=author_id
+            ).order_by('-pub_date', '-pk')[:11],
+            'comments': Comment.objects.with_related().filter(
+                post=post
+            ).order_by('created'),
+        }
+        if group_id is not None:
+            queries['group_list'] = Post.objects.with_related().filter(
+                group_id=group_id
+            ).order_by('-pub_date', '-pk')[:11]
+        if follow is not None:
+            queries['following'] = Follow.objects.filter(
+                user_id=follow.user_id, author_id=follow.author_id
+            )
+            queries['follow_index'] = FeedItem.objects.filter(
+                user_id=follow.user_id
+            ).order_by('-pub_date', '-post_id')[:11]
+        return queries
+
+    def measure(self, queries):
+        results = {}
+        for name, queryset in queries.items():
+            timings = []
+            for _ in range(self.repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append(time.perf_counter() - started)
+            results[name] = (queryset.explain(), statistics.median(timings))
+        return results
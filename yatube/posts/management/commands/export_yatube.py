@@ -0,0 +1,66 @@
+import gzip
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.exports import FORMATS, TABLES, encode, parse_since, scan
+
+
+class Command(BaseCommand):
+    help = 'Выгружает группы, посты, комментарии и подписки в gzip-файлы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Каталог для файлов выгрузки')
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument(
+            '--tables', default=','.join(TABLES),
+            help='Таблицы через запятую: ' + ', '.join(TABLES),
+        )
+        parser.add_argument(
+            '--since',
+            help='Только посты и комментарии не старше этой даты',
+        )
+        parser.add_argument(
+            '--after-id', type=int,
+            help='Только строки с id больше этого (для одной таблицы)',
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        tables = [name.strip() for name in options['tables'].split(',')]
+        unknown = set(tables) - set(TABLES)
+        if unknown:
+            raise CommandError(f'Нет таблиц: {", ".join(sorted(unknown))}')
+        if options['after_id'] and len(tables) > 1:
+            raise CommandError('--after-id задается для одной таблицы')
+        since = None
+        if options['since']:
+            try:
+                since = parse_since(options['since'])
+            except ValueError as error:
+                raise CommandError(error)
+        os.makedirs(options['output'], exist_ok=True)
+        for table in tables:
+            path = os.path.join(
+                options['output'], f'{table}.{options["format"]}.gz'
+            )
+            counted = self.count(scan(
+                table, since, options['after_id'], options['chunk_size']
+            ))
+            with gzip.open(path, 'wt', encoding='utf-8', newline='') as target:
+                for line in encode(
+                    counted, TABLES[table][1], options['format']
+                ):
+                    target.write(line)
+            self.stdout.write(
+                f'{table}: {self.total} строк, последний id {self.last_id}'
+                f' → {path}'
+            )
+
+    def count(self, rows):
+        self.total = 0
+        self.last_id = None
+        for row in rows:
+            self.total += 1
+            self.last_id = row['id']
+            yield row
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts import comment_queue
+
+
+class Command(BaseCommand):
+    help = 'Переносит комментарии из очереди в базу'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--watch', action='store_true',
+            help='Не завершаться, а разбирать очередь постоянно',
+        )
+
+    def handle(self, *args, **options):
+        if options['watch']:
+            comment_queue.write_behind()
+        count = comment_queue.drain()
+        self.stdout.write(
+            f'Записано: {count}, в очереди: {comment_queue.depth()}'
+        )
@@ -0,0 +1,53 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.models import Post
+from posts.thumbnails import generate
+
+
+def init_worker():
+    django.setup()
+    connections.close_all()
+
+
+def generate_chunk(post_ids):
+    return sum(generate(post_id) for post_id in post_ids)
+
+
+class Command(BaseCommand):
+    help = 'Заранее строит миниатюры картинок постов в нескольких процессах'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Перестроить миниатюры и у постов, где они уже есть',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').order_by('pk')
+        if not options['all']:
+            posts = posts.filter(thumbnails='')
+        post_ids = list(posts.values_list('pk', flat=True))
+        size = options['batch_size']
+        chunks = [
+            post_ids[start:start + size]
+            for start in range(0, len(post_ids), size)
+        ]
+        connections.close_all()
+        done = 0
+        with ProcessPoolExecutor(
+            max_workers=options['workers'], initializer=init_worker
+        ) as executor:
+            futures = [
+                executor.submit(generate_chunk, chunk) for chunk in chunks
+            ]
+            for future in as_completed(futures):
+                done += future.result()
+                self.stdout.write(f'Готово {done} из {len(post_ids)}')
+        self.stdout.write(self.style.SUCCESS(f'Миниатюры построены: {done}'))
@@ -0,0 +1,243 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.bulk import create_posts
+from posts.forms import PostForm
+from posts.models import Group, Post
+from posts.uploads import HEADER_LIMIT, check_header
+
+User = get_user_model()
+
+
+def read_jsonl(stream):
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            yield None, f'битый JSON: {error}'
+            continue
+        if not isinstance(record, dict):
+            yield None, 'запись должна быть объектом'
+            continue
+        yield record, None
+
+
+def read_csv(stream):
+    for record in csv.DictReader(stream):
+        yield record, None
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+def check_image(path):
+    """Те же проверки, что проходит картинка, загруженная через форму."""
+    try:
+        size = os.path.getsize(path)
+        with open(path, 'rb') as source:
+            header = source.read(HEADER_LIMIT)
+    except OSError as error:
+        return f'картинка недоступна: {error}'
+    if size > settings.MAX_IMAGE_UPLOAD_SIZE:
+        limit = settings.MAX_IMAGE_UPLOAD_SIZE // (1024 * 1024)
+        return f'картинка больше {limit} МБ'
+    error = check_header(header)
+    if error is NotImplemented:
+        return 'файл не похож на картинку'
+    return error
+
+
+def copy_image(path):
+    error = check_image(path)
+    if error:
+        return None, error
+    upload_to = Post._meta.get_field('image').upload_to
+    with open(path, 'rb') as source:
+        name = default_storage.save(
+            os.path.join(upload_to, os.path.basename(path)), File(source)
+        )
+    return name, None
+
+
+def clean_pub_date(record):
+    """Дата записи с часовым поясом; без даты пост получит текущую."""
+    if not record.get('pub_date'):
+        return None, None
+    try:
+        pub_date = parse_datetime(record['pub_date'])
+    except ValueError:
+        pub_date = None
+    if pub_date is None:
+        return None, f'неверная дата {record["pub_date"]!r}'
+    if timezone.is_naive(pub_date):
+        pub_date = timezone.make_aware(pub_date)
+    return pub_date, None
+
+
+class Command(BaseCommand):
+    help = 'Импортирует посты из JSONL или CSV пачками через bulk_create'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с постами, .jsonl или .csv')
+        parser.add_argument('--format', choices=sorted(READERS))
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--workers', type=int, default=8,
+            help='Потоков для копирования картинок',
+        )
+        parser.add_argument(
+            '--images-dir', default='',
+            help='Каталог, от которого считаются пути картинок',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл с номером последней импортированной записи',
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать заново, не продолжая с контрольной точки',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'jsonl'
+        )
+        self.images_dir = options['images_dir']
+        self.checkpoint = options['checkpoint'] or f'{path}.checkpoint'
+        skip = 0 if options['restart'] else self.read_checkpoint()
+        if skip:
+            self.stdout.write(f'Продолжаем после записи {skip}')
+        self.authors = dict(User.objects.values_list('username', 'pk'))
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.text_field = PostForm.base_fields['text']
+        self.started = time.monotonic()
+        self.imported = self.rejected = 0
+        batch = []
+        try:
+            stream = open(path, encoding='utf-8', newline='')
+        except OSError as error:
+            raise CommandError(f'Не удалось открыть {path}: {error}')
+        with stream, ThreadPoolExecutor(options['workers']) as executor:
+            self.executor = executor
+            for number, (record, error) in enumerate(
+                READERS[file_format](stream), 1
+            ):
+                if number <= skip:
+                    continue
+                batch.append((number, record, error))
+                if len(batch) == options['batch_size']:
+                    self.import_batch(batch)
+                    batch = []
+            if batch:
+                self.import_batch(batch)
+        if os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано {self.imported}, отклонено {self.rejected}'
+        ))
+        if self.imported:
+            self.stdout.write(
+                'Миниатюры картинок: manage.py generate_thumbnails'
+            )
+
+    def read_checkpoint(self):
+        try:
+            with open(self.checkpoint) as source:
+                return int(source.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def write_checkpoint(self, number):
+        with open(self.checkpoint, 'w') as target:
+            target.write(str(number))
+
+    def reject(self, number, error):
+        self.rejected += 1
+        self.stderr.write(f'запись {number}: {error}')
+
+    def copy_image(self, image):
+        if not image:
+            return '', None
+        return copy_image(os.path.join(self.images_dir, image))
+
+    def build_post(self, record):
+        fields = {}
+        for name, clean in (
+            ('text', self.clean_text),
+            ('author_id', self.clean_author),
+            ('group_id', self.clean_group),
+            ('pub_date', clean_pub_date),
+        ):
+            fields[name], error = clean(record)
+            if error:
+                return None, error
+        return Post(**fields), None
+
+    def clean_text(self, record):
+        try:
+            return self.text_field.clean(record.get('text')), None
+        except ValidationError as error:
+            return None, f'text: {" ".join(error.messages)}'
+
+    def clean_author(self, record):
+        author_id = self.authors.get(record.get('author'))
+        if author_id is None:
+            return None, f'нет автора {record.get("author")!r}'
+        return author_id, None
+
+    def clean_group(self, record):
+        if not record.get('group'):
+            return None, None
+        group_id = self.groups.get(record['group'])
+        if group_id is None:
+            return None, f'нет группы {record["group"]!r}'
+        return group_id, None
+
+    def import_batch(self, batch):
+        posts = []
+        images = []
+        for number, record, error in batch:
+            post = None
+            if not error:
+                post, error = self.build_post(record)
+            if error:
+                self.reject(number, error)
+                continue
+            posts.append(post)
+            images.append((number, record.get('image')))
+        copied = self.executor.map(
+            self.copy_image, [image for number, image in images]
+        )
+        accepted = []
+        for post, (number, image), (name, error) in zip(
+            posts, images, copied
+        ):
+            if error:
+                self.reject(number, error)
+                continue
+            post.image = name
+            accepted.append(post)
+        if accepted:
+            create_posts(accepted)
+        self.write_checkpoint(batch[-1][0])
+        self.imported += len(accepted)
+        rate = self.imported / max(time.monotonic() - self.started, 1e-6)
+        self.stdout.write(
+            f'Запись {batch[-1][0]}: импортировано {self.imported}, '
+            f'отклонено {self.rejected}, {rate:.0f} постов/с'
+        )
@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import popular
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинги популярных постов, общий и групп'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--watch', action='store_true',
+            help='Пересчитывать каждые POPULAR_INTERVAL секунд',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            count = popular.rank()
+            self.stdout.write(
+                f'Мест в рейтингах: {count}, за '
+                f'{(time.perf_counter() - started) * 1000:.1f} мс'
+            )
+            if not options['watch']:
+                return
+            time.sleep(settings.POPULAR_INTERVAL)
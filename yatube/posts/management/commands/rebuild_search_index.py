@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from posts import search
+from posts.models import Post, PostTerm
+
+
+class Command(BaseCommand):
+    help = 'Заново строит поисковый индекс постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        with transaction.atomic():
+            if search.use_fts():
+                with connection.cursor() as cursor:
+                    cursor.execute(f'DELETE FROM {search.FTS_TABLE}')
+            else:
+                PostTerm.objects.all().delete()
+        posts = Post.objects.only('text').order_by('pk')
+        total = 0
+        last_pk = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                for post in batch:
+                    search.index_post(post)
+            total += len(batch)
+            last_pk = batch[-1].pk
+        self.stdout.write(f'проиндексировано постов: {total}')
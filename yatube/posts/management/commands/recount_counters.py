@@ -0,0 +1,129 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.caching import bump
+from posts.models import Comment, Follow, Group, Post, UserStats
+from posts.signals import latest_post_date
+
+User = get_user_model()
+
+
+def count_related(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')})
+        .order_by().values(field).annotate(total=Count('pk'))
+        .values('total')
+    ), 0)
+
+
+def chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счетчики постов, комментариев и подписок '
+        'и даты последних постов групп'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        repaired = {
+            'group': self.repair(
+                Group, 'posts_count', Post, 'group', 'group', ('groups',)
+            ),
+            'post': self.repair(
+                Post, 'comments_count', Comment, 'post', 'post'
+            ),
+            'user': self.repair_users(),
+            'group activity': self.repair_activity(),
+        }
+        for name, total in repaired.items():
+            self.stdout.write(f'{name}: исправлено {total}')
+
+    def repair(self, model, counter, related_model, field, scope, *scopes):
+        """Исправляет счетчик; bulk_update не шлет сигналов, поэтому
+        области кэша scope исправленных строк и scopes сбрасываются здесь.
+        """
+        drift = model.objects.order_by().annotate(
+            actual=count_related(related_model, field)
+        ).exclude(**{counter: F('actual')}).values_list('pk', 'actual')
+        total = 0
+        for chunk in chunks(drift.iterator(), self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_update(
+                    [
+                        model(pk=pk, **{counter: actual})
+                        for pk, actual in chunk
+                    ],
+                    [counter],
+                )
+            bump(*scopes, *[(scope, pk) for pk, _ in chunk])
+            total += len(chunk)
+        return total
+
+    def repair_activity(self):
+        stale = [
+            group for group in Group.objects.annotate(
+                actual=latest_post_date()
+            ).only('pk', 'last_post_at')
+            if group.last_post_at != group.actual
+        ]
+        for group in stale:
+            group.last_post_at = group.actual
+        with transaction.atomic():
+            Group.objects.bulk_update(
+                stale, ['last_post_at'], batch_size=self.batch_size
+            )
+        if stale:
+            bump(('groups',), *[('group', group.pk) for group in stale])
+        return len(stale)
+
+    def repair_users(self):
+        users = User.objects.order_by('pk').annotate(
+            posts_total=count_related(Post, 'author'),
+            followers_total=count_related(Follow, 'author'),
+            following_total=count_related(Follow, 'user'),
+        ).values_list(
+            'pk', 'posts_total', 'followers_total', 'following_total'
+        )
+        fields = ('posts_count', 'followers_count', 'following_count')
+        total = 0
+        for chunk in chunks(users.iterator(), self.batch_size):
+            existing = UserStats.objects.in_bulk(
+                [row[0] for row in chunk], field_name='user_id'
+            )
+            created, updated = [], []
+            for user_id, *counts in chunk:
+                actual = dict(zip(fields, counts))
+                stats = existing.get(user_id)
+                if stats is None:
+                    created.append(UserStats(user_id=user_id, **actual))
+                elif any(
+                    getattr(stats, name) != value
+                    for name, value in actual.items()
+                ):
+                    for name, value in actual.items():
+                        setattr(stats, name, value)
+                    updated.append(stats)
+            with transaction.atomic():
+                UserStats.objects.bulk_create(created)
+                UserStats.objects.bulk_update(updated, fields)
+            changed = [*created, *updated]
+            if changed:
+                bump(*[('author', stats.user_id) for stats in changed])
+            total += len(changed)
+        return total
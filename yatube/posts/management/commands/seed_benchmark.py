@@ -0,0 +1,172 @@
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+from mixer.backend.django import mixer
+
+from posts.bulk import create_posts
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+BENCHMARK_PASSWORD = 'benchmark'
+
+
+def zipf_weights(size, exponent):
+    """Накопленные веса рангов 1..size, чтобы выбор был со скосом."""
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, size + 1)
+    ))
+
+
+class Command(BaseCommand):
+    help = 'Заполняет базу большим набором данных для нагрузочных тестов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--groups', type=int, default=100)
+        parser.add_argument('--comments', type=int, default=200_000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Среднее число подписок у пользователя',
+        )
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Показатель закона Ципфа для авторов и подписок',
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.fake = Faker('ru_RU')
+        self.fake.seed_instance(options['seed'])
+        self.batch_size = options['batch_size']
+        user_ids = self.seed_users(options['users'])
+        group_ids = self.seed_groups(options['groups'])
+        weights = zipf_weights(len(user_ids), options['skew'])
+        self.seed_follows(user_ids, weights, options['follows'])
+        # Популярные авторы не раскладываются по лентам, поэтому число
+        # подписчиков нужно знать до вставки постов.
+        call_command('recount_counters', stdout=self.stdout)
+        # Плодовитость авторов тоже со скосом, но не совпадает с
+        # популярностью, иначе почти все посты уходят в большие ленты.
+        authors = user_ids[:]
+        self.random.shuffle(authors)
+        post_ids = self.seed_posts(
+            options['posts'], authors, group_ids, weights
+        )
+        self.seed_comments(options['comments'], user_ids, post_ids)
+        call_command('recount_counters', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: пароль всех пользователей «{BENCHMARK_PASSWORD}»'
+        ))
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield range(start, min(start + self.batch_size, total))
+
+    def seed_users(self, total):
+        password = make_password(BENCHMARK_PASSWORD)
+        first = User.objects.count()
+        for batch in self.batches(total):
+            User.objects.bulk_create(
+                User(
+                    username=f'bench{first + number}',
+                    first_name=self.fake.first_name(),
+                    last_name=self.fake.last_name(),
+                    password=password,
+                )
+                for number in batch
+            )
+            self.stdout.write(f'Пользователи: {batch.stop} из {total}')
+        return list(
+            User.objects.filter(username__startswith='bench')
+            .order_by('pk').values_list('pk', flat=True)
+        )
+
+    def seed_groups(self, total):
+        first = Group.objects.count()
+        groups = mixer.cycle(total).blend(
+            Group,
+            slug=(f'bench-{first + number}' for number in range(total)),
+        )
+        return [group.pk for group in groups]
+
+    def seed_follows(self, user_ids, weights, per_user):
+        follows = set()
+        total = len(user_ids) * per_user
+        for user_id in user_ids:
+            count = min(
+                int(self.random.expovariate(1 / per_user)), len(user_ids) - 1
+            )
+            for author_id in self.random.choices(
+                user_ids, cum_weights=weights, k=count
+            ):
+                if author_id != user_id:
+                    follows.add((user_id, author_id))
+            if len(follows) >= self.batch_size:
+                self.save_follows(follows)
+                follows = set()
+        self.save_follows(follows)
+        self.stdout.write(f'Подписки: около {total}')
+
+    def save_follows(self, follows):
+        Follow.objects.bulk_create(
+            [
+                Follow(user_id=user_id, author_id=author_id)
+                for user_id, author_id in follows
+            ],
+            ignore_conflicts=True,
+        )
+
+    def seed_posts(self, total, user_ids, group_ids, weights):
+        now = timezone.now()
+        for batch in self.batches(total):
+            authors = self.random.choices(
+                user_ids, cum_weights=weights, k=len(batch)
+            )
+            posts = [
+                Post(
+                    text=self.fake.paragraph(nb_sentences=4),
+                    author_id=author_id,
+                    group_id=(
+                        self.random.choice(group_ids)
+                        if group_ids and self.random.random() < 0.5
+                        else None
+                    ),
+                    pub_date=now - timedelta(
+                        minutes=self.random.randrange(365 * 24 * 60)
+                    ),
+                )
+                for author_id in authors
+            ]
+            create_posts(posts)
+            self.stdout.write(f'Посты: {batch.stop} из {total}')
+        return list(Post.objects.values_list('pk', flat=True))
+
+    def seed_comments(self, total, user_ids, post_ids):
+        if not post_ids:
+            return
+        weights = zipf_weights(len(post_ids), 1.0)
+        for batch in self.batches(total):
+            with transaction.atomic():
+                Comment.objects.bulk_create(
+                    Comment(
+                        post_id=post_id,
+                        author_id=self.random.choice(user_ids),
+                        text=self.fake.sentence(),
+                    )
+                    for post_id in self.random.choices(
+                        post_ids, cum_weights=weights, k=len(batch)
+                    )
+                )
+            self.stdout.write(f'Комментарии: {batch.stop} из {total}')
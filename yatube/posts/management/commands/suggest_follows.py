@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import suggestions
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации подписок по графу подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = suggestions.rebuild(
+            options['workers'], options['chunk_size']
+        )
+        self.stdout.write(
+            f'Рекомендаций: {count}, за '
+            f'{time.perf_counter() - started:.1f} с'
+        )
@@ -0,0 +1,103 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from core import templates
+from core.metrics import registry
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Разбирает все шаблоны и сравнивает холодный и теплый рендер'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--benchmark', action='store_true',
+            help='Замерить время рендера страниц без кэша шаблонов и с ним',
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument(
+            '--host', default='localhost',
+            help='Заголовок Host для тестового клиента',
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count, errors = templates.warm()
+        for name, error in errors.items():
+            self.stderr.write(f'{name}: {error}')
+        self.stdout.write(
+            f'Шаблонов: {count}, за '
+            f'{(time.perf_counter() - started) * 1000:.1f} мс'
+        )
+        if errors:
+            raise CommandError(f'Ошибок в шаблонах: {len(errors)}')
+        if options['benchmark']:
+            self.benchmark(options['repeat'], options['host'])
+
+    def pages(self):
+        """Адреса страниц, для которых есть данные в базе."""
+        pages = {
+            'posts:index': reverse('posts:index'),
+            'posts:search': reverse('posts:search') + '?q=пост',
+            'posts:groups': reverse('posts:groups'),
+            'about:author': reverse('about:author'),
+            'about:tech': reverse('about:tech'),
+            'users:login': reverse('users:login'),
+            'users:signup': reverse('users:signup'),
+        }
+        post = Post.objects.select_related('author').first()
+        if post is not None:
+            pages['posts:post_detail'] = reverse(
+                'posts:post_detail', args=[post.pk]
+            )
+            pages['posts:profile'] = reverse(
+                'posts:profile', args=[post.author.username]
+            )
+        group = Group.objects.first()
+        if group is not None:
+            pages['posts:group_list'] = reverse(
+                'posts:group_list', args=[group.slug]
+            )
+        return pages
+
+    def render_times(self, client, view, url, repeat, cold):
+        """Медианы времени рендера и всего ответа в миллисекундах."""
+        renders, responses = [], []
+        for _ in range(repeat):
+            if cold:
+                templates.reset()
+            registry.clear()
+            client.get(url)
+            stats = registry.views.get(view)
+            if stats is None:
+                raise CommandError(f'{url} не попал в метрики как {view}')
+            renders.append(stats['template_time'])
+            responses.append(stats['duration'])
+        return (
+            statistics.median(renders) * 1000,
+            statistics.median(responses) * 1000,
+        )
+
+    def benchmark(self, repeat, host):
+        templates.use_cached_loader()
+        client = Client(HTTP_HOST=host)
+        for view, url in self.pages().items():
+            client.get(url)
+            cold, cold_total = self.render_times(
+                client, view, url, repeat, cold=True
+            )
+            warm, warm_total = self.render_times(
+                client, view, url, repeat, cold=False
+            )
+            self.stdout.write(
+                f'{view:<18} рендер {cold:>6.2f} → {warm:>6.2f} мс  '
+                f'ответ {cold_total:>6.2f} → {warm_total:>6.2f} мс  '
+                f'быстрее в {cold_total / warm_total:.1f} раза'
+            )
@@ -0,0 +1,79 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:53
+
+import re
+from collections import Counter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+FTS_TABLE = 'posts_post_fts'
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def fts5_available(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return ('ENABLE_FTS5',) in cursor.fetchall()
+
+
+def fill_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if fts5_available(connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+                "text, tokenize='unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE}(rowid, text) '
+                'SELECT id, text FROM posts_post'
+            )
+        return
+    Post = apps.get_model('posts', 'Post')
+    PostTerm = apps.get_model('posts', 'PostTerm')
+    for post_id, text in Post.objects.values_list('pk', 'text').iterator():
+        terms = Counter(
+            token[:64] for token in TOKEN_RE.findall(text.casefold())
+        )
+        length = sum(terms.values())
+        PostTerm.objects.bulk_create(
+            PostTerm(
+                post_id=post_id, term=term, frequency=frequency, length=length
+            )
+            for term, frequency in terms.items()
+        )
+
+
+def drop_index(apps, schema_editor):
+    schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_thumbnails'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Слово')),
+                ('frequency', models.PositiveIntegerField(verbose_name='Частота')),
+                ('length', models.PositiveIntegerField(verbose_name='Длина поста в словах')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Слово поиска',
+                'verbose_name_plural': 'Слова поиска',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='postterm',
+            constraint=models.UniqueConstraint(fields=('term', 'post'), name='unique_post_term'),
+        ),
+        migrations.RunPython(fill_index, drop_index),
+    ]
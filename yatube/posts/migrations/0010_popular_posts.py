@@ -0,0 +1,45 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_group_last_post_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PopularPost',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveIntegerField(verbose_name='Место')),
+                ('score', models.FloatField(verbose_name='Оценка')),
+            ],
+            options={
+                'verbose_name': 'Популярный пост',
+                'verbose_name_plural': 'Популярные посты',
+                'ordering': ('rank',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['created', 'post'], name='comment_created_post_idx'),
+        ),
+        migrations.AddField(
+            model_name='popularpost',
+            name='group',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Group', verbose_name='Группа'),
+        ),
+        migrations.AddField(
+            model_name='popularpost',
+            name='post',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='popularity', to='posts.Post', verbose_name='Пост'),
+        ),
+        migrations.AddIndex(
+            model_name='popularpost',
+            index=models.Index(fields=['group', 'rank'], name='popular_group_rank_idx'),
+        ),
+    ]
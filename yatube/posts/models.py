@@ -1,11 +1,34 @@
-from django.db import models
+import json
+
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
 
 User = get_user_model()
 NUM_OF_SYM = 15
 
 
-class Group(models.Model):
+class DerivedFieldsModel(models.Model):
+    """Модель с полями, которые обновляются только через update()."""
+
+    derived_fields = ()
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not (
+            kwargs.get('update_fields') or kwargs.get('force_insert')
+        ):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.derived_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class Group(DerivedFieldsModel):
     title = models.CharField(
         'Название',
         max_length=200,
@@ -20,12 +43,30 @@ class Group(models.Model):
         'Описание',
         help_text='Описание группы'
     )
+    posts_count = models.PositiveIntegerField(
+        'Число постов',
+        default=0,
+        editable=False,
+    )
+    last_post_at = models.DateTimeField(
+        'Последний пост',
+        null=True,
+        blank=True,
+        editable=False,
+    )
+
+    derived_fields = ('posts_count', 'last_post_at')
 
     def __str__(self):
         return self.title
 
 
-class Post(models.Model):
+class PostQuerySet(models.QuerySet):
+    def with_related(self):
+        return self.select_related('author', 'group')
+
+
+class Post(DerivedFieldsModel):
     text = models.TextField(
         'Текст',
         help_text='Текст поста'
@@ -54,14 +95,52 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False,
+    )
+    thumbnails = models.TextField(
+        'Миниатюры',
+        blank=True,
+        editable=False,
+    )
+
+    objects = PostQuerySet.as_manager()
+
+    derived_fields = ('comments_count', 'thumbnails')
 
     def __str__(self):
         return self.text[:NUM_OF_SYM]
 
-    class Meta:
+    @cached_property
+    def thumbnail_urls(self):
+        try:
+            urls = json.loads(self.thumbnails)
+        except ValueError:
+            return {}
+        return urls if isinstance(urls, dict) else {}
+
+    class Meta(DerivedFieldsModel.Meta):
         ordering = ['-pub_date']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'], name='post_date_idx'),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_date_idx',
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_date_idx',
+            ),
+        ]
+
+
+class CommentQuerySet(models.QuerySet):
+    def with_related(self):
+        return self.select_related('author')
 
 
 class Comment(models.Model):
@@ -86,6 +165,19 @@ class Comment(models.Model):
         auto_now_add=True,
     )
 
+    objects = CommentQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('created', 'id')
+        indexes = [
+            models.Index(
+                fields=['post', 'created'], name='comment_post_created_idx'
+            ),
+            models.Index(
+                fields=['created', 'post'], name='comment_created_post_idx'
+            ),
+        ]
+
     def __str__(self):
         return self.text[:NUM_OF_SYM]
 
@@ -106,5 +198,194 @@ class Follow(models.Model):
         null=True,
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'], name='unique_follow'
+            ),
+        ]
+
     def __str__(self):
         return self.author.username
+
+
+class UserStats(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='stats',
+        verbose_name='Пользователь',
+    )
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков',
+        default=0,
+    )
+    following_count = models.PositiveIntegerField(
+        'Число подписок',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Счетчики пользователя'
+        verbose_name_plural = 'Счетчики пользователей'
+
+    def __str__(self):
+        return str(self.user)
+
+    @classmethod
+    def counted(cls, user_id):
+        return cls(
+            user_id=user_id,
+            posts_count=Post.objects.filter(author_id=user_id).count(),
+            followers_count=Follow.objects.filter(author_id=user_id).count(),
+            following_count=Follow.objects.filter(user_id=user_id).count(),
+        )
+
+    @classmethod
+    def of(cls, user):
+        try:
+            return user.stats
+        except cls.DoesNotExist:
+            stats = cls.counted(user.pk)
+        try:
+            with transaction.atomic():
+                stats.save()
+        except IntegrityError:
+            stats = cls.objects.get(user_id=user.pk)
+        user.stats = stats
+        return stats
+
+
+class FeedItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Пост',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    pub_date = models.DateTimeField('Дата')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_feed_item'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'], name='feed_page_idx'
+            ),
+            models.Index(fields=['user', 'author'], name='feed_author_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user} ← {self.post}'
+
+
+class PostTerm(models.Model):
+    """Запись инвертированного индекса: слово поста и его частота."""
+
+    term = models.CharField('Слово', max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='terms',
+        verbose_name='Пост',
+    )
+    frequency = models.PositiveIntegerField('Частота')
+    length = models.PositiveIntegerField('Длина поста в словах')
+
+    class Meta:
+        verbose_name = 'Слово поиска'
+        verbose_name_plural = 'Слова поиска'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['term', 'post'], name='unique_post_term'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.term} → {self.post_id}'
+
+
+class PopularPost(models.Model):
+    """Место поста в рейтинге популярного: общем или группы."""
+
+    group = models.ForeignKey(
+        Group,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Группа',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='popularity',
+        verbose_name='Пост',
+    )
+    rank = models.PositiveIntegerField('Место')
+    score = models.FloatField('Оценка')
+
+    class Meta:
+        ordering = ('rank',)
+        verbose_name = 'Популярный пост'
+        verbose_name_plural = 'Популярные посты'
+        indexes = [
+            models.Index(
+                fields=['group', 'rank'], name='popular_group_rank_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.rank}. {self.post_id}'
+
+
+class FollowSuggestion(models.Model):
+    """Автор, на которого стоит подписаться; без user — общий список."""
+
+    user = models.ForeignKey(
+        User,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name='suggestions',
+        verbose_name='Читатель',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    rank = models.PositiveIntegerField('Место')
+    score = models.FloatField('Оценка')
+
+    class Meta:
+        ordering = ('rank',)
+        verbose_name = 'Рекомендация подписки'
+        verbose_name_plural = 'Рекомендации подписок'
+        indexes = [
+            models.Index(
+                fields=['user', 'rank'], name='suggestion_user_rank_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} → {self.author}'
@@ -0,0 +1,206 @@
+import base64
+import binascii
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+FORWARD = 'f'
+BACKWARD = 'b'
+
+
+def encode_cursor(row, number, direction, date_field='pub_date'):
+    date = getattr(row, date_field).isoformat()
+    raw = f'{date}|{row.pk}|{number}|{direction}'
+    token = base64.urlsafe_b64encode(raw.encode())
+    return token.decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        pub_date, pk, number, direction = raw.split('|')
+        pub_date = parse_datetime(pub_date)
+        pk, number = int(pk), int(number)
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+    if pub_date is None or direction not in (FORWARD, BACKWARD):
+        return None
+    return pub_date, pk, max(number, 1), direction
+
+
+def parse_number(page_number):
+    try:
+        return max(int(page_number), 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def seek(queryset, limit, position=None, backward=False, offset=0,
+         date_field='pub_date', pk_field='pk'):
+    """Строки после позиции (pub_date, pk) в порядке ленты."""
+    lookup = 'gt' if backward else 'lt'
+    if position is not None:
+        pub_date, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{date_field}__{lookup}': pub_date})
+            | Q(**{date_field: pub_date, f'{pk_field}__{lookup}': pk})
+        )
+    if backward:
+        ordering = (date_field, pk_field)
+    else:
+        ordering = (f'-{date_field}', f'-{pk_field}')
+    return list(queryset.order_by(*ordering)[offset:offset + limit])
+
+
+class CursorPaginator(Paginator):
+    """Постраничный вывод по ключу (pub_date, pk) без COUNT и OFFSET.
+
+    Страница запрашивается непрозрачным курсором ``?cursor=``; старые
+    ссылки вида ``?page=N`` по-прежнему открываются через OFFSET.
+    """
+
+    date_field = 'pub_date'
+
+    def __init__(self, object_list, per_page, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._num_pages = 1
+
+    @property
+    def num_pages(self):
+        return self._num_pages
+
+    def fetch(self, limit, position=None, backward=False, offset=0):
+        return seek(
+            self.object_list, limit, position, backward, offset,
+            date_field=self.date_field,
+        )
+
+    def get_cursor_page(self, cursor=None, page_number=None):
+        position = decode_cursor(cursor) if cursor else None
+        if position is None:
+            return self._offset_page(page_number)
+        pub_date, pk, number, direction = position
+        if direction == BACKWARD:
+            return self._backward_page(pub_date, pk, number)
+        return self._forward_page(pub_date, pk, number)
+
+    def page_key(self, cursor=None, page_number=None):
+        """Что задает строки страницы: позиция курсора с направлением или
+        номер страницы; по нему страница кэшируется.
+        """
+        position = decode_cursor(cursor) if cursor else None
+        if position is None:
+            return ('page', parse_number(page_number))
+        pub_date, pk, number, direction = position
+        return (direction, pub_date.isoformat(), pk)
+
+    def _forward_page(self, pub_date, pk, number):
+        rows = self.fetch(self.per_page + 1, (pub_date, pk))
+        has_next = len(rows) > self.per_page
+        return self.build_page(rows, max(number, 2), has_next)
+
+    def _backward_page(self, pub_date, pk, number):
+        rows = self.fetch(self.per_page + 1, (pub_date, pk), backward=True)
+        if len(rows) <= self.per_page:
+            return self._offset_page(1)
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return self.build_page(rows, max(number, 2), True)
+
+    def _offset_page(self, page_number):
+        number = parse_number(page_number)
+        rows = self.fetch(
+            self.per_page + 1, offset=(number - 1) * self.per_page
+        )
+        if not rows and number > 1:
+            number = max((self.count - 1) // self.per_page + 1, 1)
+            rows = self.fetch(
+                self.per_page + 1, offset=(number - 1) * self.per_page
+            )
+        has_next = len(rows) > self.per_page
+        return self.build_page(rows, number, has_next)
+
+    def build_page(self, rows, number, has_next):
+        rows = rows[:self.per_page]
+        self._num_pages = number + 1 if has_next else number
+        page = self._get_page(rows, number, self)
+        page.next_cursor = None
+        page.previous_cursor = None
+        if has_next:
+            page.next_cursor = self.cursor(rows[-1], number + 1, FORWARD)
+        if number > 1 and rows:
+            page.previous_cursor = self.cursor(rows[0], number - 1, BACKWARD)
+        return page
+
+    def cursor(self, row, number, direction):
+        return encode_cursor(row, number, direction, self.date_field)
+
+
+class CommentPaginator(CursorPaginator):
+    """Комментарии по ключу (created, pk) от старых к новым.
+
+    Страницы только вперед: следующие комментарии подгружаются по
+    курсору последнего показанного.
+    """
+
+    date_field = 'created'
+
+    def fetch(self, limit, position=None, backward=False, offset=0):
+        return super().fetch(limit, position, not backward, offset)
+
+    def position(self, cursor):
+        """Разобранный курсор (created, pk, номер) или None."""
+        position = decode_cursor(cursor) if cursor else None
+        return position and position[:3]
+
+    def get_cursor_page(self, cursor=None, page_number=None):
+        position = self.position(cursor)
+        if position is None:
+            return self._offset_page(1)
+        return self._forward_page(*position)
+
+    def cursor(self, row, number, direction):
+        if direction != FORWARD:
+            return None
+        return super().cursor(row, number, direction)
+
+
+class FeedPaginator(CursorPaginator):
+    """Лента подписок из FeedItem, слитая с постами популярных авторов."""
+
+    def __init__(self, feed_items, per_page, extra_posts=None, **kwargs):
+        super().__init__(feed_items, per_page, **kwargs)
+        self.extra_posts = extra_posts
+
+    @cached_property
+    def count(self):
+        total = self.object_list.count()
+        if self.extra_posts is not None:
+            total += self.extra_posts.count()
+        return total
+
+    def fetch(self, limit, position=None, backward=False, offset=0):
+        if self.extra_posts is None:
+            return self.feed_posts(limit, position, backward, offset)
+        posts = {
+            post.pk: post
+            for post in self.feed_posts(offset + limit, position, backward)
+        }
+        for post in seek(self.extra_posts, offset + limit, position, backward):
+            posts.setdefault(post.pk, post)
+        rows = sorted(
+            posts.values(),
+            key=lambda post: (post.pub_date, post.pk),
+            reverse=not backward,
+        )
+        return rows[offset:offset + limit]
+
+    def feed_posts(self, limit, position=None, backward=False, offset=0):
+        items = seek(
+            self.object_list, limit, position, backward, offset,
+            pk_field='post_id',
+        )
+        return [item.post for item in items]
@@ -0,0 +1,86 @@
+import heapq
+import math
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .caching import bump
+from .models import Comment, PopularPost, Post
+
+
+def score(comments, followers, age):
+    """Оценка поста: свежие комментарии и аудитория автора, гаснущие с
+    возрастом поста в часах, как в рейтинге Hacker News.
+    """
+    weight = (
+        1
+        + comments * settings.POPULAR_COMMENT_WEIGHT
+        + math.log1p(followers) * settings.POPULAR_FOLLOWER_WEIGHT
+    )
+    return weight / (age + 2) ** settings.POPULAR_GRAVITY
+
+
+def candidates(since):
+    """Посты окна: опубликованные после since или с комментариями за окно.
+
+    Оба условия — диапазоны по индексам дат, так что старые посты без
+    новых комментариев не читаются. Комментарии считаются в Python: с
+    GROUP BY SQLite предпочитает пройти весь индекс (post, created).
+    """
+    comments = Counter(
+        Comment.objects.filter(created__gte=since).order_by()
+        .values_list('post_id', flat=True).iterator()
+    )
+    posts = Post.objects.filter(
+        Q(pub_date__gte=since)
+        | Q(pk__in=Comment.objects.filter(created__gte=since).values('post'))
+    ).order_by().values_list(
+        'pk', 'group_id', 'pub_date', 'author__stats__followers_count'
+    )
+    for pk, group_id, pub_date, followers in posts.iterator():
+        yield pk, group_id, pub_date, comments.get(pk, 0), followers or 0
+
+
+def rank(now=None):
+    """Пересчитывает общий рейтинг и рейтинги групп; возвращает их размер."""
+    now = now or timezone.now()
+    since = now - timedelta(hours=settings.POPULAR_WINDOW_HOURS)
+    size = settings.POPULAR_SIZE
+    everything = []
+    groups = defaultdict(list)
+    for pk, group_id, pub_date, comments, followers in candidates(since):
+        age = (now - pub_date).total_seconds() / 3600
+        entry = (score(comments, followers, max(age, 0)), pk)
+        everything.append(entry)
+        if group_id is not None:
+            groups[group_id].append(entry)
+    rows = top(None, everything, size)
+    for group_id, entries in groups.items():
+        rows += top(group_id, entries, size)
+    with transaction.atomic():
+        PopularPost.objects.all().delete()
+        PopularPost.objects.bulk_create(rows, batch_size=500)
+        bump(('popular',))
+    return len(rows)
+
+
+def top(group_id, entries, size):
+    return [
+        PopularPost(group_id=group_id, post_id=pk, rank=number, score=value)
+        for number, (value, pk) in enumerate(
+            heapq.nlargest(size, entries), 1
+        )
+    ]
+
+
+def popular_posts(group=None):
+    """Посты рейтинга по местам: общего или группы."""
+    return [
+        row.post for row in PopularPost.objects.filter(
+            group=group
+        ).select_related('post__author', 'post__group')
+    ]
@@ -0,0 +1,226 @@
+import base64
+import binascii
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Sum
+
+from .caching import remember
+from .models import Post, PostTerm
+from .paginators import FORWARD, CursorPaginator
+
+FTS_TABLE = 'posts_post_fts'
+TOKEN_RE = re.compile(r'[^\W_]+')
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 10
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_fts_enabled = None
+
+
+def tokenize(text):
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in TOKEN_RE.findall(text.casefold())
+    ]
+
+
+def use_fts():
+    """FTS5, если она не выключена в настройках и таблица создана."""
+    global _fts_enabled
+    if settings.SEARCH_BACKEND == 'table':
+        return False
+    if _fts_enabled is None:
+        _fts_enabled = FTS_TABLE in connection.introspection.table_names()
+    return _fts_enabled
+
+
+def index_post(post):
+    index_posts([post])
+
+
+def index_posts(posts):
+    """Переиндексирует посты пачкой: одна вставка на всю пачку."""
+    post_ids = [post.pk for post in posts]
+    if use_fts():
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [[post_id] for post_id in post_ids],
+            )
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (%s, %s)',
+                [[post.pk, post.text] for post in posts],
+            )
+        return
+    PostTerm.objects.filter(post_id__in=post_ids).delete()
+    terms = []
+    for post in posts:
+        frequencies = Counter(tokenize(post.text))
+        length = sum(frequencies.values())
+        terms.extend(
+            PostTerm(
+                post_id=post.pk, term=term, frequency=frequency,
+                length=length,
+            )
+            for term, frequency in frequencies.items()
+        )
+    PostTerm.objects.bulk_create(terms, batch_size=1000)
+
+
+def unindex_post(post_id):
+    if use_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id]
+            )
+
+
+def fts_rows(terms, limit, position=None, filters=None):
+    match = ' '.join(f'"{term}"' for term in terms)
+    sql = [
+        'SELECT hit.id, hit.score FROM ('
+        f'SELECT rowid AS id, bm25({FTS_TABLE}) AS score '
+        f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s) hit'
+    ]
+    params = [match]
+    where = []
+    if filters:
+        sql.append(f'JOIN {Post._meta.db_table} post ON post.id = hit.id')
+        for column, value in filters.items():
+            where.append(f'post.{column} = %s')
+            params.append(value)
+    if position is not None:
+        where.append('(hit.score > %s OR (hit.score = %s AND hit.id > %s))')
+        score, pk = position
+        params.extend([score, score, pk])
+    if where:
+        sql.append('WHERE ' + ' AND '.join(where))
+    sql.append('ORDER BY hit.score, hit.id')
+    if limit is not None:
+        sql.append('LIMIT %s')
+        params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(' '.join(sql), params)
+        return cursor.fetchall()
+
+
+def corpus_stats():
+    """Число проиндексированных постов и слов в них."""
+    def count():
+        totals = PostTerm.objects.aggregate(
+            documents=Count('post', distinct=True), tokens=Sum('frequency')
+        )
+        return totals['documents'], totals['tokens'] or 0
+
+    return remember('search_stats', [('posts',)], count)
+
+
+def table_rows(terms, limit, position=None, filters=None):
+    """BM25 по таблице PostTerm: читаются только постинги слов запроса."""
+    postings = PostTerm.objects.filter(term__in=terms)
+    frequencies = defaultdict(dict)
+    lengths = {}
+    for post_id, term, frequency, length in postings.values_list(
+        'post_id', 'term', 'frequency', 'length'
+    ):
+        frequencies[post_id][term] = frequency
+        lengths[post_id] = length
+    if filters:
+        allowed = set(Post.objects.filter(
+            pk__in=list(frequencies), **filters
+        ).values_list('pk', flat=True))
+    else:
+        allowed = frequencies.keys()
+    documents, tokens = corpus_stats()
+    average_length = tokens / documents if documents else 1
+    document_frequency = Counter(
+        term for found in frequencies.values() for term in found
+    )
+    idf = {
+        term: math.log(
+            (documents - count + 0.5) / (count + 0.5) + 1
+        )
+        for term, count in document_frequency.items()
+    }
+    rows = []
+    for post_id in allowed:
+        found = frequencies[post_id]
+        if len(found) < len(terms):
+            continue
+        norm = BM25_K1 * (
+            1 - BM25_B + BM25_B * lengths[post_id] / average_length
+        )
+        score = -sum(
+            idf[term] * frequency * (BM25_K1 + 1) / (frequency + norm)
+            for term, frequency in found.items()
+        )
+        if position is None or (score, post_id) > position:
+            rows.append((post_id, score))
+    rows.sort(key=lambda row: (row[1], row[0]))
+    return rows if limit is None else rows[:limit]
+
+
+def find(query, limit=None, position=None, filters=None):
+    """Пары (id поста, оценка) от лучшей к худшей; меньше оценка — лучше."""
+    terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+    if not terms:
+        return []
+    rows = fts_rows if use_fts() else table_rows
+    return rows(terms, limit, position, filters)
+
+
+def encode_position(score, pk, number):
+    raw = f'{score!r}|{pk}|{number}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_position(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        score, pk, number = raw.split('|')
+        score, pk, number = float(score), int(pk), int(number)
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+    if not math.isfinite(score):
+        return None
+    return score, pk, max(number, 2)
+
+
+class SearchPaginator(CursorPaginator):
+    """Результаты поиска по ключу (оценка, pk), страницы только вперед."""
+
+    def __init__(self, query, per_page, group=None, author=None, **kwargs):
+        super().__init__(Post.objects.with_related(), per_page, **kwargs)
+        self.query = query
+        self.filters = {}
+        if group is not None:
+            self.filters['group_id'] = group.pk
+        if author is not None:
+            self.filters['author_id'] = author.pk
+
+    def get_cursor_page(self, cursor=None, page_number=None):
+        position = decode_position(cursor) if cursor else None
+        number = 1
+        if position is not None:
+            *position, number = position
+            position = tuple(position)
+        rows = find(self.query, self.per_page + 1, position, self.filters)
+        posts = self.object_list.in_bulk([pk for pk, score in rows])
+        found = []
+        for pk, score in rows:
+            post = posts.get(pk)
+            if post is not None:
+                post.search_score = score
+                found.append(post)
+        return self.build_page(found, number, len(rows) > self.per_page)
+
+    def cursor(self, row, number, direction):
+        if direction != FORWARD:
+            return None
+        return encode_position(row.search_score, row.pk, number)
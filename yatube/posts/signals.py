@@ -0,0 +1,214 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F, OuterRef, Q, Subquery
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import receiver
+
+from . import feeds, search, uploads
+from .caching import bump, bump_post
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+def change_counter(queryset, field, delta, **values):
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gt': 0})
+    return queryset.update(**{field: F(field) + delta}, **values)
+
+
+def latest_post_date():
+    """Подзапрос: дата последнего поста группы."""
+    return Subquery(
+        Post.objects.filter(group=OuterRef('pk'))
+        .order_by('-pub_date').values('pub_date')[:1]
+    )
+
+
+def change_user_counter(user_id, field, delta):
+    if user_id is None:
+        return
+    stats = UserStats.objects.filter(user_id=user_id)
+    if change_counter(stats, field, delta) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            UserStats.counted(user_id).save()
+    except IntegrityError:
+        pass
+
+
+def change_group_counter(group_id, delta):
+    if group_id is not None:
+        change_counter(
+            Group.objects.filter(pk=group_id), 'posts_count', delta,
+            last_post_at=latest_post_date(),
+        )
+
+
+@receiver(pre_save, sender=Post)
+def remember_saved_post(sender, instance, **kwargs):
+    if instance.pk is not None:
+        (
+            instance._saved_group_id,
+            instance._saved_image,
+            instance._saved_text,
+        ) = Post.objects.filter(pk=instance.pk).values_list(
+            'group_id', 'image', 'text'
+        ).first() or (None, '', None)
+
+
+def refresh_thumbnails(post, created):
+    if created:
+        changed = bool(post.image)
+    else:
+        changed = getattr(post, '_saved_image', '') != post.image.name
+    if not changed:
+        return
+    if not created:
+        Post.objects.filter(pk=post.pk).update(thumbnails='')
+        post.thumbnails = ''
+        post.__dict__.pop('thumbnail_urls', None)
+    if post.image:
+        uploads.schedule(post)
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    if created:
+        change_user_counter(instance.author_id, 'posts_count', 1)
+        change_group_counter(instance.group_id, 1)
+        feeds.fan_out(instance)
+        search.index_post(instance)
+        refresh_thumbnails(instance, created)
+        bump_post(instance, instance.group_id)
+        return
+    saved_group_id = getattr(instance, '_saved_group_id', None)
+    if saved_group_id != instance.group_id:
+        change_group_counter(saved_group_id, -1)
+        change_group_counter(instance.group_id, 1)
+    if getattr(instance, '_saved_text', None) != instance.text:
+        search.index_post(instance)
+    refresh_thumbnails(instance, created)
+    bump_post(instance, saved_group_id, instance.group_id)
+    instance._saved_group_id = instance.group_id
+    instance._saved_image = instance.image.name
+    instance._saved_text = instance.text
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    change_user_counter(instance.author_id, 'posts_count', -1)
+    change_group_counter(instance.group_id, -1)
+    search.unindex_post(instance.pk)
+    bump_post(instance, instance.group_id)
+
+
+def post_scopes(posts):
+    """Версии постов, их авторов и групп: в карточках и на странице поста
+    показаны имя автора и группа, так что их правка меняет посты.
+    """
+    scopes = set()
+    for post_id, author_id, group_id in posts.values_list(
+        'pk', 'author_id', 'group_id'
+    ):
+        scopes.add(('post', post_id))
+        scopes.add(('author', author_id))
+        if group_id is not None:
+            scopes.add(('group', group_id))
+    return scopes
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def bump_group(sender, instance, **kwargs):
+    bump(
+        ('posts',), ('groups',), ('group', instance.pk),
+        *post_scopes(Post.objects.filter(group=instance)),
+    )
+
+
+SHOWN_USER_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def shown_fields(user):
+    return tuple(getattr(user, name) for name in SHOWN_USER_FIELDS)
+
+
+@receiver(pre_save, sender=User)
+def remember_shown_fields(sender, instance, update_fields=None, **kwargs):
+    if instance.pk is None or (
+        update_fields is not None
+        and not set(SHOWN_USER_FIELDS) & set(update_fields)
+    ):
+        return
+    instance._saved_fields = User.objects.filter(
+        pk=instance.pk
+    ).values_list(*SHOWN_USER_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def bump_saved_user(sender, instance, created, **kwargs):
+    """Кэш сбрасывается, только если сменилось имя, видное на сайте.
+
+    Вход обновляет last_login и не должен сбрасывать его всем. Карта
+    имен пользователей зависит только от username.
+    """
+    saved = getattr(instance, '_saved_fields', None)
+    instance._saved_fields = shown_fields(instance)
+    if created:
+        bump(('users',))
+    if saved is None or saved == instance._saved_fields:
+        return
+    scopes = post_scopes(Post.objects.filter(
+        Q(author=instance) | Q(comments__author=instance)
+    ).distinct())
+    if saved[0] != instance.username:
+        scopes.add(('users',))
+    bump(('posts',), ('author', instance.pk), *scopes)
+
+
+@receiver(post_save, sender=User)
+def create_user_stats(sender, instance, created, raw=False, **kwargs):
+    """У нового пользователя счетчики нулевые, их не нужно считать."""
+    if created and not raw:
+        UserStats.objects.get_or_create(user_id=instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def bump_deleted_user(sender, instance, **kwargs):
+    bump(('users',))
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, **kwargs):
+    if created:
+        change_counter(
+            Post.objects.filter(pk=instance.post_id), 'comments_count', 1
+        )
+    bump(('post', instance.post_id))
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    change_counter(
+        Post.objects.filter(pk=instance.post_id), 'comments_count', -1
+    )
+    bump(('post', instance.post_id))
+
+
+@receiver(post_save, sender=Follow)
+def count_saved_follow(sender, instance, created, **kwargs):
+    if created:
+        change_user_counter(instance.user_id, 'following_count', 1)
+        change_user_counter(instance.author_id, 'followers_count', 1)
+        feeds.backfill(instance)
+        bump(('author', instance.user_id), ('author', instance.author_id))
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    change_user_counter(instance.user_id, 'following_count', -1)
+    change_user_counter(instance.author_id, 'followers_count', -1)
+    feeds.trim(instance)
+    feeds.backfill_followers(instance.author_id)
+    bump(('author', instance.user_id), ('author', instance.author_id))
@@ -0,0 +1,223 @@
+import heapq
+import math
+from array import array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from operator import itemgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+
+from .caching import bump
+from .models import Follow, FollowSuggestion
+
+_graph = None
+
+
+class Graph:
+    """Граф подписок в виде двух CSR: подписки и подписчики.
+
+    Пользователи пронумерованы по порядку pk в ids; подписки i-го —
+    out_targets[out_offsets[i]:out_offsets[i + 1]], подписчики — так же
+    в in_*. Массивы array('q') занимают по 8 байт на связь и быстро
+    передаются в процессы пула.
+    """
+
+    def __init__(self, ids, out_offsets, out_targets, in_offsets,
+                 in_targets):
+        self.ids = ids
+        self.out_offsets, self.out_targets = out_offsets, out_targets
+        self.in_offsets, self.in_targets = in_offsets, in_targets
+
+    @classmethod
+    def from_edges(cls, edges):
+        """Граф из пар (подписчик, автор) по pk пользователей."""
+        users, authors = array('q'), array('q')
+        for user_id, author_id in edges:
+            users.append(user_id)
+            authors.append(author_id)
+        ids = array('q', sorted(set(users) | set(authors)))
+        index = {pk: number for number, pk in enumerate(ids)}
+        users = array('q', (index[pk] for pk in users))
+        authors = array('q', (index[pk] for pk in authors))
+        return cls(
+            ids,
+            *compress(len(ids), users, authors),
+            *compress(len(ids), authors, users),
+        )
+
+    def following(self, node):
+        return self.out_targets[
+            self.out_offsets[node]:self.out_offsets[node + 1]
+        ]
+
+    def followers(self, node):
+        return self.in_targets[
+            self.in_offsets[node]:self.in_offsets[node + 1]
+        ]
+
+    def follower_count(self, node):
+        return self.in_offsets[node + 1] - self.in_offsets[node]
+
+    def suggest(self, node, size, max_followers, similar_users):
+        """Лучшие кандидаты для подписки: (номер автора, оценка).
+
+        Оценка складывается из друзей друзей — авторов, на которых
+        подписаны авторы пользователя, — и подписок похожих читателей,
+        у которых общие с ним авторы. Общий автор весит тем меньше, чем
+        больше у него подписчиков, а авторов с подписчиками сверх
+        max_followers для похожести не смотрим вовсе; подписки берутся
+        у similar_users самых похожих читателей. При равной оценке выше
+        автор с большим числом подписчиков.
+        """
+        following = self.following(node)
+        scores = defaultdict(float)
+        similar = defaultdict(float)
+        for author in following:
+            for candidate in self.following(author):
+                scores[candidate] += 1
+            followers = self.followers(author)
+            if len(followers) > max_followers:
+                continue
+            weight = 1 / math.log(2 + len(followers))
+            for reader in followers:
+                similar[reader] += weight
+        similar.pop(node, None)
+        for reader, weight in heapq.nlargest(
+            similar_users, similar.items(), key=itemgetter(1)
+        ):
+            for candidate in self.following(reader):
+                scores[candidate] += weight
+        for seen in (node, *following):
+            scores.pop(seen, None)
+        return heapq.nlargest(
+            size, scores.items(),
+            key=lambda item: (item[1], self.follower_count(item[0])),
+        )
+
+    def popular(self, size):
+        """Авторы с наибольшим числом подписчиков: (номер, подписчики)."""
+        return heapq.nlargest(
+            size,
+            (
+                (node, self.follower_count(node))
+                for node in range(len(self.ids))
+            ),
+            key=itemgetter(1),
+        )
+
+
+def compress(count, sources, targets):
+    """CSR из списка ребер sources[i] → targets[i] сортировкой подсчетом."""
+    offsets = array('q', bytes(8 * (count + 1)))
+    for source in sources:
+        offsets[source + 1] += 1
+    for node in range(count):
+        offsets[node + 1] += offsets[node]
+    position = array('q', offsets)
+    compressed = array('q', bytes(8 * len(sources)))
+    for source, target in zip(sources, targets):
+        compressed[position[source]] = target
+        position[source] += 1
+    return offsets, compressed
+
+
+def load_graph():
+    return Graph.from_edges(
+        Follow.objects.filter(user__isnull=False, author__isnull=False)
+        .order_by().values_list('user_id', 'author_id').iterator()
+    )
+
+
+def use_graph(graph):
+    global _graph
+    _graph = graph
+
+
+def suggest_chunk(nodes, **options):
+    """Рекомендации пользователям nodes в pk: [(user, [(author, оценка)])].
+
+    Выполняется в процессах пула с графом из use_graph и не трогает
+    настройки Django, так что работает и без django.setup().
+    """
+    ids = _graph.ids
+    return [
+        (ids[node], [
+            (ids[author], score)
+            for author, score in _graph.suggest(node, **options)
+        ])
+        for node in nodes
+    ]
+
+
+def compute(graph, size, workers=0, chunk_size=500):
+    """Рекомендации всем читателям графа, по кускам в пуле процессов."""
+    readers = [
+        node for node in range(len(graph.ids))
+        if graph.out_offsets[node + 1] > graph.out_offsets[node]
+    ]
+    chunks = [
+        readers[start:start + chunk_size]
+        for start in range(0, len(readers), chunk_size)
+    ]
+    task = partial(
+        suggest_chunk, size=size,
+        max_followers=settings.SUGGESTION_MAX_FOLLOWERS,
+        similar_users=settings.SUGGESTION_SIMILAR_USERS,
+    )
+    if workers < 2:
+        use_graph(graph)
+        for chunk in chunks:
+            yield from task(chunk)
+        return
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=use_graph, initargs=(graph,)
+    ) as executor:
+        for result in executor.map(task, chunks):
+            yield from result
+
+
+def rebuild(workers=0, chunk_size=500):
+    """Пересчитывает таблицу рекомендаций; возвращает число строк."""
+    size = settings.FOLLOW_SUGGESTIONS
+    graph = load_graph()
+    rows = [
+        FollowSuggestion(
+            user_id=None, author_id=graph.ids[node], rank=number,
+            score=followers,
+        )
+        for number, (node, followers) in enumerate(graph.popular(size), 1)
+    ]
+    for user_id, authors in compute(graph, size, workers, chunk_size):
+        rows += [
+            FollowSuggestion(
+                user_id=user_id, author_id=author_id, rank=number,
+                score=score,
+            )
+            for number, (author_id, score) in enumerate(authors, 1)
+        ]
+    with transaction.atomic():
+        FollowSuggestion.objects.all().delete()
+        FollowSuggestion.objects.bulk_create(rows, batch_size=500)
+        bump(('suggestions',))
+    return len(rows)
+
+
+def suggestions_for(user):
+    """Авторы для подписки: личные рекомендации, дополненные общими.
+
+    Сам пользователь и авторы, на которых он уже подписан, отбрасываются.
+    """
+    rows = FollowSuggestion.objects.filter(
+        Q(user=user) | Q(user__isnull=True)
+    ).exclude(author=user).exclude(
+        author__following__user=user
+    ).select_related('author').order_by(
+        F('user').asc(nulls_last=True), 'rank'
+    )
+    authors = {}
+    for row in rows:
+        authors.setdefault(row.author_id, row.author)
+    return list(authors.values())[:settings.FOLLOW_SUGGESTIONS]
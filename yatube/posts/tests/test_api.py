@@ -0,0 +1,150 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..caching import version_key
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        for number in range(12):
+            cls.post = Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_lists_and_cursor(self):
+        urls = [
+            reverse('posts:api_posts'),
+            reverse('posts:api_group_posts', kwargs={'slug': 'group'}),
+            reverse(
+                'posts:api_profile_posts', kwargs={'username': 'Author'}
+            ),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.client.get(url).json()
+                self.assertEqual(len(first['results']), 10)
+                self.assertEqual(first['results'][0]['id'], self.post.pk)
+                second = self.client.get(
+                    url, {'cursor': first['next_cursor']}
+                ).json()
+                self.assertEqual(len(second['results']), 2)
+                self.assertIsNone(second['next_cursor'])
+
+    def test_fields(self):
+        url = reverse('posts:api_posts')
+        response = self.client.get(url, {'fields': 'id,text'})
+        self.assertEqual(
+            response.json()['results'][0],
+            {'id': self.post.pk, 'text': self.post.text},
+        )
+        response = self.client.get(url, {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_group_and_author(self):
+        for url in (
+            reverse('posts:api_group_posts', kwargs={'slug': 'missing'}),
+            reverse(
+                'posts:api_profile_posts', kwargs={'username': 'missing'}
+            ),
+            reverse('posts:api_post_detail', kwargs={'post_id': 10 ** 6}),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_not_modified_without_queries(self):
+        """Повторный запрос с If-None-Match получает 304 без обращения к БД."""
+        urls = [
+            reverse('posts:api_posts'),
+            reverse('posts:api_group_posts', kwargs={'slug': 'group'}),
+            reverse(
+                'posts:api_profile_posts', kwargs={'username': 'Author'}
+            ),
+            reverse(
+                'posts:api_post_detail', kwargs={'post_id': self.post.pk}
+            ),
+        ]
+        later = time.time() + 2
+        for url in urls:
+            with self.subTest(url=url):
+                with mock.patch('posts.caching.time.time', lambda: later):
+                    response = self.client.get(url)
+                self.assertTrue(response.has_header('Last-Modified'))
+                etag = response['ETag']
+                with self.assertNumQueries(0):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_last_modified_not_reused_within_second(self):
+        """Правка в ту же секунду не дает устаревший 304 по дате."""
+        url = reverse(
+            'posts:api_post_detail', kwargs={'post_id': self.post.pk}
+        )
+        self.assertFalse(self.client.get(url).has_header('Last-Modified'))
+        old = time.time_ns() - 5 * 10 ** 9
+        for scope in (('post', self.post.pk), ('author', self.author.pk)):
+            cache.set(version_key(scope), old, None)
+        modified = self.client.get(url)['Last-Modified']
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Правка'
+        )
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=modified)
+        self.assertEqual(response.status_code, 200)
+
+    def test_changes_refresh_etag(self):
+        list_url = reverse('posts:api_posts')
+        detail_url = reverse(
+            'posts:api_post_detail', kwargs={'post_id': self.post.pk}
+        )
+        list_etag = self.client.get(list_url)['ETag']
+        detail_etag = self.client.get(detail_url)['ETag']
+        Post.objects.create(text='Новый пост', author=self.author)
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Комментарий'
+        )
+        response = self.client.get(list_url, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['text'], 'Новый пост')
+        response = self.client.get(
+            detail_url, HTTP_IF_NONE_MATCH=detail_etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()['comments'][0]['text'], 'Комментарий'
+        )
+
+    def test_comment_refreshes_count(self):
+        """Число комментариев отдается только в посте и не устаревает."""
+        list_url = reverse('posts:api_posts')
+        detail_url = reverse(
+            'posts:api_post_detail', kwargs={'post_id': self.post.pk}
+        )
+        first = self.client.get(list_url).json()['results'][0]
+        self.assertNotIn('comments_count', first)
+        response = self.client.get(list_url, {'fields': 'comments_count'})
+        self.assertEqual(response.status_code, 400)
+        etag = self.client.get(detail_url)['ETag']
+        self.client.force_login(self.author)
+        self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Комментарий'},
+        )
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['comments_count'], 1)
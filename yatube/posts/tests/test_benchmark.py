@@ -0,0 +1,52 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..management.commands.benchmark import SCENARIOS, percentile
+from ..models import FeedItem, Follow, Group, Post
+
+
+class BenchmarkTests(TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.95), 95)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([], 0.5), 0)
+
+    def test_seed_and_run(self):
+        call_command(
+            'seed_benchmark', '--users', '30', '--posts', '60',
+            '--groups', '3', '--comments', '20', '--follows', '5',
+            '--batch-size', '25', stdout=StringIO(),
+        )
+        self.assertEqual(Post.objects.count(), 60)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(FeedItem.objects.exists())
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        output = os.path.join(directory, 'results.json')
+        call_command(
+            'benchmark', '--requests', '3', '--warmup', '1',
+            '--clients', '2', '--host', 'testserver',
+            '--output', output, stdout=StringIO(),
+        )
+        with open(output) as source:
+            results = json.load(source)['results']
+        self.assertEqual(set(results), set(SCENARIOS))
+        for name, result in results.items():
+            with self.subTest(scenario=name):
+                self.assertEqual(result['requests'], 3)
+                self.assertEqual(result['errors'], 0)
+                self.assertIsNotNone(result['queries_mean'])
+        call_command(
+            'benchmark', '--requests', '3', '--scenarios', 'index',
+            '--host', 'testserver', '--baseline', output,
+            '--tolerance', '1000', stdout=StringIO(),
+        )
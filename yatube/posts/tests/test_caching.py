@@ -0,0 +1,169 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..caching import bump, get_or_set, remember, versions
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class VersionedCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.group = Group.objects.create(
+            title='Group',
+            slug='slug',
+            description='Description'
+        )
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_users_scope_ignores_logins(self):
+        author = User.objects.get(pk=self.author.pk)
+        author.set_password('password')
+        author.save()
+        version = versions(('users',))
+        self.client.login(username='Author', password='password')
+        self.assertEqual(versions(('users',)), version)
+        author.username = 'Renamed'
+        author.save()
+        self.assertNotEqual(versions(('users',)), version)
+
+    def test_card_follows_author_and_group(self):
+        """Карточки и списки обновляются после правки автора и группы."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for url in urls:
+            self.client.get(url)
+        author = User.objects.get(pk=self.author.pk)
+        author.first_name, author.last_name = 'Лев', 'Толстой'
+        author.save()
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'renamed'
+        group.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'Лев Толстой')
+        self.assertContains(
+            self.client.get(urls[0]),
+            reverse('posts:group_list', kwargs={'slug': 'renamed'}),
+        )
+
+    def test_profile_follows_group(self):
+        """Профиль автора показывает новый адрес группы после правки."""
+        urls = (
+            reverse('posts:profile', kwargs={'username': 'Author'}),
+            reverse(
+                'posts:api_profile_posts', kwargs={'username': 'Author'}
+            ),
+        )
+        for url in urls:
+            self.client.get(url)
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'renamed'
+        group.save()
+        self.assertContains(
+            self.client.get(urls[0]),
+            reverse('posts:group_list', kwargs={'slug': 'renamed'}),
+        )
+        self.assertEqual(
+            self.client.get(urls[1]).json()['results'][0]['group'],
+            'renamed',
+        )
+
+    def test_remember_until_bump(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(remember('value', [('scope', 1)], compute), 1)
+        self.assertEqual(remember('value', [('scope', 1)], compute), 1)
+        before = versions(('scope', 1))
+        bump(('scope', 1))
+        self.assertGreater(versions(('scope', 1)), before)
+        self.assertEqual(remember('value', [('scope', 1)], compute), 2)
+
+    def test_get_or_set_computes_once_under_load(self):
+        """Холодный ключ пересчитывается одним потоком из многих."""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'value'
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(get_or_set('hot', compute))
+            )
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 5)
+
+    def test_get_or_set_recomputes_early(self):
+        """Дорогое значение пересчитывается незадолго до истечения."""
+        cache.set('cheap', ('old', time.time() + 1, 0.0), 60)
+        cache.set('costly', ('old', time.time() + 1, 10.0), 60)
+        with mock.patch('posts.caching.random.random', return_value=0.9):
+            self.assertEqual(get_or_set('cheap', lambda: 'new'), 'old')
+            self.assertEqual(get_or_set('costly', lambda: 'new'), 'new')
+
+    def test_post_detail_sees_new_comment(self):
+        """Новый комментарий сразу виден на странице поста."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Свежий комментарий'
+        )
+        self.assertContains(self.client.get(url), 'Свежий комментарий')
+
+    def test_group_page_follows_post_edits(self):
+        """Пост, перенесенный в другую группу, пропадает со страницы."""
+        url = reverse('posts:group_list', kwargs={'slug': 'slug'})
+        self.assertEqual(len(self.client.get(url).context['page_obj']), 1)
+        self.post.group = None
+        self.post.save()
+        self.assertEqual(len(self.client.get(url).context['page_obj']), 0)
+
+    def test_post_cards_follow_post_edits(self):
+        """Закэшированные карточки обновляются после правки поста."""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'slug'}),
+            reverse('posts:profile', kwargs={'username': 'Author'}),
+        ]
+        for url in urls:
+            self.assertContains(self.client.get(url), 'Пост')
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Исправленный текст'
+        post.save()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(
+                    self.client.get(url), 'Исправленный текст'
+                )
@@ -0,0 +1,173 @@
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from .. import comment_queue
+from ..bulk import create_comments
+from ..models import Comment, Post
+
+User = get_user_model()
+
+TEMP_DIR = tempfile.mkdtemp()
+
+
+@override_settings(
+    COMMENT_QUEUE=True,
+    COMMENT_QUEUE_PATH=f'{TEMP_DIR}/queue.sqlite3',
+    COMMENT_QUEUE_MAX_DEPTH=3,
+)
+class CommentQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        comment_queue.journal().execute('DELETE FROM comments')
+        comment_queue.journal().execute('DELETE FROM failed_comments')
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.add_url = reverse(
+            'posts:add_comment', kwargs={'post_id': self.post.pk}
+        )
+        self.detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+
+    def test_comment_waits_in_queue(self):
+        self.client.get(self.detail_url)
+        with self.assertNumQueries(2):
+            response = self.client.post(self.add_url, {'text': 'В очереди'})
+        self.assertRedirects(response, self.detail_url)
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(comment_queue.depth(), 1)
+
+    def test_author_sees_pending_comment(self):
+        self.client.post(self.add_url, {'text': 'В очереди'})
+        response = self.client.get(self.detail_url)
+        self.assertContains(response, 'В очереди')
+        self.assertContains(response, 'публикуется')
+        other = Client()
+        other.force_login(User.objects.create_user(username='Other'))
+        self.assertNotContains(other.get(self.detail_url), 'В очереди')
+
+    def test_flush_writes_batch(self):
+        for number in range(3):
+            self.client.post(self.add_url, {'text': f'Комментарий {number}'})
+        self.client.get(self.detail_url)
+        self.assertEqual(comment_queue.flush(), 3)
+        self.assertEqual(comment_queue.depth(), 0)
+        self.assertEqual(
+            list(self.post.comments.values_list('text', flat=True)),
+            ['Комментарий 0', 'Комментарий 1', 'Комментарий 2'],
+        )
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.comments_count, 3)
+        response = self.client.get(self.detail_url)
+        self.assertNotContains(response, 'публикуется')
+        self.assertContains(response, 'Комментарий 2')
+
+    def test_invalid_comment_is_not_queued(self):
+        self.client.post(self.add_url, {'text': ''})
+        self.assertEqual(comment_queue.depth(), 0)
+
+    def test_missing_post(self):
+        response = self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': 0}),
+            {'text': 'Некуда'},
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(comment_queue.depth(), 0)
+
+    def test_full_queue_rejects(self):
+        for number in range(3):
+            self.client.post(self.add_url, {'text': f'Комментарий {number}'})
+        response = self.client.post(self.add_url, {'text': 'Лишний'})
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(comment_queue.depth(), 3)
+
+    def test_reclaimed_batch_is_not_duplicated(self):
+        self.client.post(self.add_url, {'text': 'Один раз'})
+        _, rows = comment_queue.claim(10)
+        create_comments([
+            Comment(
+                post_id=post_id, author_id=author_id, text=text,
+                created=datetime.fromisoformat(created),
+            )
+            for _, post_id, author_id, text, created, _ in rows
+        ])
+        comment_queue.journal().execute(
+            'UPDATE comments SET claimed_at = 0'
+        )
+        self.assertEqual(comment_queue.flush(), 1)
+        self.assertEqual(self.post.comments.count(), 1)
+        self.assertEqual(comment_queue.depth(), 0)
+
+    def test_deleted_post_is_dropped(self):
+        post = Post.objects.create(text='Удалится', author=self.author)
+        self.client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            {'text': 'Потеряется'},
+        )
+        post.delete()
+        self.assertEqual(comment_queue.flush(), 1)
+        self.assertFalse(Comment.objects.exists())
+
+    @override_settings(COMMENT_QUEUE_MAX_ATTEMPTS=2)
+    def test_failing_comment_goes_to_dead_letter(self):
+        """Пачка пишется по одному, а сбойная запись уходит в сторону."""
+        for text in ('Хороший', 'Сломанный'):
+            self.client.post(self.add_url, {'text': text})
+
+        def create(comments):
+            if any(comment.text == 'Сломанный' for comment in comments):
+                raise ValueError('сломан')
+            return create_comments(comments)
+
+        with mock.patch('posts.comment_queue.create_comments', create):
+            with self.assertRaises(ValueError):
+                comment_queue.flush()
+            comment_queue.journal().execute(
+                'UPDATE comments SET claimed_at = 0'
+            )
+            with self.assertLogs('posts.comment_queue', 'ERROR'):
+                self.assertEqual(comment_queue.flush(), 2)
+        self.assertEqual(
+            list(self.post.comments.values_list('text', flat=True)),
+            ['Хороший'],
+        )
+        self.assertEqual(comment_queue.depth(), 0)
+        self.assertEqual(
+            comment_queue.journal().execute(
+                'SELECT text, attempts FROM failed_comments'
+            ).fetchall(),
+            [('Сломанный', 2)],
+        )
+
+    @override_settings(BACKGROUND_WORKERS=1)
+    def test_writer_restarts_when_thread_is_gone(self):
+        """После fork поток родителя мертв, и писатель стартует заново."""
+        finished = threading.Thread(target=lambda: None)
+        finished.start()
+        finished.join()
+        with mock.patch.object(comment_queue, '_writer', finished):
+            with mock.patch(
+                'posts.comment_queue.threading.Thread'
+            ) as thread:
+                comment_queue.start()
+                comment_queue.start()
+        thread.return_value.start.assert_called_once_with()
@@ -0,0 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..models import Comment, Post
+from ..views import NUM_OF_COMMENTS
+
+User = get_user_model()
+
+COMMENTS = 2 * NUM_OF_COMMENTS + 5
+
+
+class CommentPagesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+        cls.quiet_post = Post.objects.create(text='Тихий', author=cls.author)
+        for number in range(COMMENTS):
+            Comment.objects.create(
+                post=cls.post, author=cls.author, text=f'Комментарий {number}'
+            )
+        Comment.objects.create(
+            post=cls.quiet_post, author=cls.author, text='Единственный'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_post_detail_shows_first_page(self):
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        comments = response.context['comments']
+        self.assertEqual(
+            [comment.text for comment in comments],
+            [f'Комментарий {number}' for number in range(NUM_OF_COMMENTS)],
+        )
+        self.assertContains(response, comments.next_cursor)
+
+    def test_later_pages_as_html(self):
+        url = reverse('posts:comments', kwargs={'post_id': self.post.pk})
+        texts = []
+        cursor = ''
+        while True:
+            response = self.client.get(url, {'cursor': cursor})
+            self.assertTemplateUsed(response, 'posts/includes/comments.html')
+            self.assertTemplateNotUsed(response, 'base.html')
+            page = response.context['comments']
+            texts += [comment.text for comment in page]
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(
+            texts, [f'Комментарий {number}' for number in range(COMMENTS)]
+        )
+
+    def test_later_pages_as_json(self):
+        url = reverse(
+            'posts:api_post_comments', kwargs={'post_id': self.post.pk}
+        )
+        first = self.client.get(url).json()
+        self.assertEqual(len(first['results']), NUM_OF_COMMENTS)
+        second = self.client.get(
+            url, {'cursor': first['next_cursor']}
+        ).json()
+        self.assertEqual(
+            second['results'][0]['text'], f'Комментарий {NUM_OF_COMMENTS}'
+        )
+        detail = self.client.get(
+            reverse('posts:api_post_detail', kwargs={'post_id': self.post.pk})
+        ).json()
+        self.assertEqual(detail['comments_next_cursor'], first['next_cursor'])
+
+    def test_post_detail_cost_does_not_grow(self):
+        for post in (self.quiet_post, self.post):
+            cache.clear()
+            url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+            with self.assertNumQueries(2):
+                self.client.get(url)
+
+    def test_new_comment_appears_on_last_page(self):
+        url = reverse('posts:comments', kwargs={'post_id': self.post.pk})
+        first = self.client.get(url).context['comments']
+        last = self.client.get(
+            url, {'cursor': first.next_cursor}
+        ).context['comments']
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Новый'
+        )
+        response = self.client.get(url, {'cursor': last.next_cursor})
+        self.assertContains(response, 'Новый')
+
+    def test_cache_key_uses_cursor_position(self):
+        """Курсоры с той же позицией берут страницу из одной записи кэша."""
+        url = reverse('posts:comments', kwargs={'post_id': self.post.pk})
+        first = self.client.get(url).context['comments']
+        second = self.client.get(
+            url, {'cursor': first.next_cursor}
+        ).context['comments']
+        cases = {
+            'garbage': first,
+            'Zm9v': first,
+            first.next_cursor + '==': second,
+        }
+        for cursor, expected in cases.items():
+            with self.subTest(cursor=cursor):
+                with self.assertNumQueries(0):
+                    page = self.client.get(
+                        url, {'cursor': cursor}
+                    ).context['comments']
+                self.assertEqual(list(page), list(expected))
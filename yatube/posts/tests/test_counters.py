@@ -0,0 +1,108 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..caching import versions
+from ..models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Group',
+            slug='slug',
+            description='Description'
+        )
+        cls.other_group = Group.objects.create(
+            title='Other',
+            slug='other',
+            description='Description'
+        )
+
+    def refresh(self):
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        return UserStats.objects.get(user=self.author)
+
+    def test_post_counters_follow_writes(self):
+        """Счетчики постов меняются при создании, правке и удалении."""
+        post = Post.objects.create(
+            text='Пост', author=self.author, group=self.group
+        )
+        Post.objects.create(text='Пост', author=self.author)
+        self.assertEqual(self.refresh().posts_count, 2)
+        self.assertEqual(self.group.posts_count, 1)
+        post.group = self.other_group
+        post.save()
+        self.refresh()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 1)
+        post.delete()
+        self.assertEqual(self.refresh().posts_count, 1)
+        self.assertEqual(self.other_group.posts_count, 0)
+
+    def test_comment_and_follow_counters(self):
+        post = Post.objects.create(text='Пост', author=self.author)
+        Comment.objects.create(post=post, author=self.reader, text='Да')
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Нет'
+        )
+        post.text = 'Новый текст'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 2)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.refresh().followers_count, 1)
+        self.assertEqual(UserStats.of(self.reader).following_count, 1)
+        follow.delete()
+        self.assertEqual(self.refresh().followers_count, 0)
+
+    def test_recount_command_repairs_drift(self):
+        """Команда recount_counters исправляет расхождения."""
+        Post.objects.bulk_create(
+            Post(text='Пост', author=self.author, group=self.group)
+            for _ in range(3)
+        )
+        Follow.objects.bulk_create([
+            Follow(user=self.reader, author=self.author)
+        ])
+        out = StringIO()
+        call_command('recount_counters', stdout=out)
+        stats = self.refresh()
+        self.assertEqual(stats.posts_count, 3)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(self.group.posts_count, 3)
+        self.assertEqual(
+            UserStats.objects.get(user=self.reader).following_count, 1
+        )
+        self.assertIn('group: исправлено 1', out.getvalue())
+
+    def test_recount_command_bumps_cache(self):
+        """После исправления счетчиков кэш страниц сбрасывается."""
+        post = Post.objects.create(
+            text='Пост', author=self.author, group=self.group
+        )
+        Comment.objects.bulk_create([
+            Comment(post=post, author=self.reader, text='Да')
+        ])
+        Post.objects.bulk_create([Post(text='Пост', author=self.reader)])
+        Group.objects.filter(pk=self.group.pk).update(posts_count=5)
+        scopes = [
+            ('post', post.pk), ('author', self.reader.pk),
+            ('group', self.group.pk), ('groups',),
+        ]
+        before = [versions(scope) for scope in scopes]
+        call_command('recount_counters', stdout=StringIO())
+        for scope, version in zip(scopes, before):
+            with self.subTest(scope=scope):
+                self.assertGreater(versions(scope), version)
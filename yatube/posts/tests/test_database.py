@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache.backends.db import BaseDatabaseCache
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.db.routers import CacheRouter
+
+User = get_user_model()
+
+
+class DatabaseTests(TransactionTestCase):
+    def test_test_profile(self):
+        self.assertEqual(settings.DJANGO_ENV, 'test')
+        self.assertEqual(settings.BACKGROUND_WORKERS, 0)
+
+    def test_pragmas(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('прагмы только для SQLite')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(
+                cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout']
+            )
+
+    def test_transactions_take_write_lock(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('BEGIN IMMEDIATE только для SQLite')
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                User.objects.create_user(username='Writer')
+        self.assertEqual(queries[0]['sql'], 'BEGIN IMMEDIATE')
+
+    def test_cache_router(self):
+        """Таблица кэша живет только в базе cache, модели — вне ее."""
+        router = CacheRouter()
+        entry = BaseDatabaseCache('yatube_cache', {}).cache_model_class
+        self.assertEqual(router.db_for_read(entry), 'cache')
+        self.assertEqual(router.db_for_write(entry), 'cache')
+        self.assertIsNone(router.db_for_read(User))
+        self.assertTrue(router.allow_migrate('cache', 'django_cache'))
+        self.assertFalse(router.allow_migrate('default', 'django_cache'))
+        self.assertFalse(router.allow_migrate('cache', 'posts'))
+        self.assertIsNone(router.allow_migrate('default', 'posts'))
@@ -0,0 +1,78 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import zlib
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..exports import scan
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.staff = User.objects.create_user(
+            username='Staff', is_staff=True
+        )
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=group
+            )
+            for number in range(5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.author, text='Комментарий'
+        )
+        Follow.objects.create(user=cls.staff, author=cls.author)
+
+    def test_scan_by_chunks(self):
+        ids = [row['id'] for row in scan('posts', chunk_size=2)]
+        self.assertEqual(ids, [post.pk for post in self.posts])
+        after = [
+            row['id']
+            for row in scan('posts', after_id=self.posts[2].pk, chunk_size=2)
+        ]
+        self.assertEqual(after, [post.pk for post in self.posts[3:]])
+
+    def test_command_writes_gzip_files(self):
+        output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output, ignore_errors=True)
+        call_command('export_yatube', output, stdout=StringIO())
+        with gzip.open(os.path.join(output, 'posts.jsonl.gz'), 'rt') as dump:
+            rows = [json.loads(line) for line in dump]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['text'], 'Пост 0')
+        call_command(
+            'export_yatube', output, '--format', 'csv',
+            '--tables', 'comments', stdout=StringIO(),
+        )
+        with gzip.open(os.path.join(output, 'comments.csv.gz'), 'rt') as dump:
+            lines = dump.read().splitlines()
+        self.assertEqual(lines[0], 'id,post_id,author_id,text,created')
+        self.assertEqual(len(lines), 2)
+
+    def test_streaming_view_for_staff_only(self):
+        url = reverse('posts:export', kwargs={'table': 'follows'})
+        client = Client()
+        client.force_login(self.author)
+        self.assertEqual(client.get(url).status_code, 302)
+        client.force_login(self.staff)
+        response = client.get(url)
+        self.assertTrue(response.streaming)
+        body = zlib.decompress(b''.join(response.streaming_content), 31)
+        self.assertEqual(json.loads(body)['user_id'], self.staff.pk)
+        response = client.get(url, {'since': 'вчера'})
+        self.assertEqual(response.status_code, 400)
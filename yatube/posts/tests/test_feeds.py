@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from ..models import FeedItem, Follow, Post
+
+User = get_user_model()
+
+
+class FollowFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.author = User.objects.create_user(username='Author')
+        cls.star = User.objects.create_user(username='Star')
+        cls.old_post = Post.objects.create(text='Старый', author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def feed_texts(self, **params):
+        response = self.client.get(reverse('posts:follow_index'), params)
+        return [post.text for post in response.context['page_obj']]
+
+    def test_feed_is_materialized_on_write(self):
+        """Подписка заполняет ленту, пост раскладывается, отписка чистит."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertTrue(FeedItem.objects.filter(
+            user=self.reader, post=self.old_post
+        ).exists())
+        Post.objects.create(text='Новый', author=self.author)
+        self.assertEqual(self.feed_texts(), ['Новый', 'Старый'])
+        Follow.objects.filter(user=self.reader, author=self.author).delete()
+        self.assertFalse(FeedItem.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.feed_texts(), [])
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_popular_author_is_read_on_request(self):
+        """Посты популярного автора не раскладываются, но видны в ленте."""
+        Follow.objects.create(user=self.reader, author=self.star)
+        Follow.objects.create(user=self.author, author=self.star)
+        for number in range(12):
+            Post.objects.create(text=f'Звезда {number}', author=self.star)
+        self.assertFalse(FeedItem.objects.filter(author=self.star).exists())
+        with self.settings(FEED_FANOUT_LIMIT=1000):
+            Follow.objects.create(user=self.reader, author=self.author)
+            Post.objects.create(text='Новый', author=self.author)
+        response = self.client.get(reverse('posts:follow_index'))
+        first = response.context['page_obj']
+        self.assertEqual(first[0].text, 'Новый')
+        second = self.feed_texts(cursor=first.next_cursor)
+        self.assertEqual(len(first) + len(second), 14)
+        self.assertEqual(second[-1], 'Старый')
+
+    @override_settings(FEED_FANOUT_LIMIT=1)
+    def test_author_leaving_popular_fills_feeds(self):
+        """Отписка до предела раскладки возвращает посты в ленты."""
+        Follow.objects.create(user=self.author, author=self.star)
+        Follow.objects.create(user=self.reader, author=self.star)
+        Post.objects.create(text='Звезда', author=self.star)
+        self.assertFalse(FeedItem.objects.filter(author=self.star).exists())
+        Follow.objects.filter(user=self.author, author=self.star).delete()
+        self.assertEqual(self.feed_texts(), ['Звезда'])
+        Post.objects.create(text='Новая', author=self.star)
+        self.assertEqual(self.feed_texts(), ['Новая', 'Звезда'])
@@ -0,0 +1,112 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class GroupDirectoryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.quiet = Group.objects.create(
+            title='Тихая', slug='quiet', description='Без постов'
+        )
+        cls.old = Group.objects.create(
+            title='Старая', slug='old', description='Давно'
+        )
+        cls.fresh = Group.objects.create(
+            title='Свежая', slug='fresh', description='Недавно'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_last_post_at_follows_posts(self):
+        first = Post.objects.create(
+            text='Первый', author=self.author, group=self.old
+        )
+        second = Post.objects.create(
+            text='Второй', author=self.author, group=self.old
+        )
+        Post.objects.filter(pk=first.pk).update(
+            pub_date=second.pub_date - timedelta(days=1)
+        )
+        first.refresh_from_db()
+        self.old.refresh_from_db()
+        self.assertEqual(self.old.last_post_at, second.pub_date)
+        second.group = self.fresh
+        second.save()
+        self.old.refresh_from_db()
+        self.fresh.refresh_from_db()
+        self.assertEqual(self.old.last_post_at, first.pub_date)
+        self.assertEqual(self.fresh.last_post_at, second.pub_date)
+        second.delete()
+        self.fresh.refresh_from_db()
+        self.assertIsNone(self.fresh.last_post_at)
+
+    def test_recount_repairs_last_post_at(self):
+        post = Post.objects.create(
+            text='Пост', author=self.author, group=self.old
+        )
+        Group.objects.update(last_post_at=None)
+        out = StringIO()
+        call_command('recount_counters', stdout=out)
+        self.old.refresh_from_db()
+        self.assertEqual(self.old.last_post_at, post.pub_date)
+        self.assertIn('group activity: исправлено 1', out.getvalue())
+
+    def test_directory_sorted_by_activity(self):
+        Post.objects.create(text='Старый', author=self.author, group=self.old)
+        Post.objects.create(
+            text='Свежий', author=self.author, group=self.fresh
+        )
+        response = self.client.get(reverse('posts:groups'))
+        self.assertEqual(
+            [group.slug for group in response.context['groups']],
+            ['fresh', 'old', 'quiet'],
+        )
+        self.assertContains(response, 'Постов: 1', count=2)
+        with self.assertNumQueries(0):
+            self.client.get(reverse('posts:groups'))
+
+    def test_directory_follows_new_posts(self):
+        self.client.get(reverse('posts:groups'))
+        Post.objects.create(text='Пост', author=self.author, group=self.quiet)
+        response = self.client.get(reverse('posts:groups'))
+        self.assertEqual(response.context['groups'][0].slug, 'quiet')
+
+    def test_group_resolved_without_queries(self):
+        url = reverse('posts:group_list', kwargs={'slug': 'fresh'})
+        self.client.get(url)
+        self.client.get(reverse('posts:group_list', kwargs={'slug': 'old'}))
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                reverse('posts:group_list', kwargs={'slug': 'missing'})
+            )
+        self.assertEqual(response.status_code, 404)
+
+    def test_group_map_follows_group_saves(self):
+        url = reverse('posts:group_list', kwargs={'slug': 'fresh'})
+        self.client.get(url)
+        group = Group.objects.get(pk=self.fresh.pk)
+        group.title = 'Переименованная'
+        group.save()
+        self.assertContains(self.client.get(url), 'Переименованная')
+        group.slug = 'renamed'
+        group.save()
+        self.assertEqual(self.client.get(url).status_code, 404)
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': 'renamed'})
+        )
+        self.assertEqual(response.status_code, 200)
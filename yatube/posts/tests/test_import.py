@@ -0,0 +1,115 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from ..bulk import create_posts
+from ..models import FeedItem, Follow, Group, Post, UserStats
+from ..search import find
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImportPostsTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='Author')
+        self.reader = User.objects.create_user(username='Reader')
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        Image.new('RGB', (20, 20)).save(os.path.join(self.dir, 'pic.png'))
+        with open(os.path.join(self.dir, 'fake.png'), 'w') as fake:
+            fake.write('не картинка')
+
+    def write(self, name, records):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w', encoding='utf-8') as target:
+            for record in records:
+                target.write(json.dumps(record, ensure_ascii=False) + '\n')
+        return path
+
+    def run_import(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command(
+            'import_posts', path, '--images-dir', self.dir, *args,
+            stdout=out, stderr=err,
+        )
+        return err.getvalue()
+
+    def test_import_keeps_derived_data(self):
+        path = self.write('posts.jsonl', [
+            {
+                'text': 'Импортированный кот',
+                'author': 'Author',
+                'group': 'group',
+                'pub_date': '2020-01-02T03:04:05',
+                'image': 'pic.png',
+            },
+            {'text': 'Второй пост', 'author': 'Author'},
+            {'text': '   ', 'author': 'Author'},
+            {'text': 'Чужой', 'author': 'Nobody'},
+            {'text': 'Без группы', 'author': 'Author', 'group': 'none'},
+            {'text': 'Фальшивка', 'author': 'Author', 'image': 'fake.png'},
+        ])
+        errors = self.run_import(path, '--batch-size', '4')
+        self.assertEqual(len(errors.splitlines()), 4)
+        post = Post.objects.get(text='Импортированный кот')
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertTrue(post.image.name.startswith('posts/pic'))
+        self.assertEqual(Post.objects.count(), 2)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(UserStats.of(self.author).posts_count, 2)
+        self.assertEqual(
+            FeedItem.objects.filter(user=self.reader).count(), 2
+        )
+        self.assertEqual([pk for pk, score in find('кот')], [post.pk])
+        self.assertFalse(os.path.exists(path + '.checkpoint'))
+
+    def test_bulk_ids_match_database(self):
+        """Id вставленных постов берутся из базы, а не из Max(pk) + 1."""
+        deleted = Post.objects.create(text='Удалится', author=self.author)
+        deleted_pk = deleted.pk
+        deleted.delete()
+        posts = create_posts([
+            Post(text='Одинаковый', author=self.author) for _ in range(3)
+        ] + [Post(text='Другой', author=self.reader)])
+        self.assertEqual(len({post.pk for post in posts}), 4)
+        self.assertGreater(min(post.pk for post in posts), deleted_pk)
+        for post in posts:
+            with self.subTest(pk=post.pk):
+                saved = Post.objects.get(pk=post.pk)
+                self.assertEqual(
+                    (saved.text, saved.author_id),
+                    (post.text, post.author_id),
+                )
+
+    def test_resume_from_checkpoint(self):
+        path = self.write('posts.jsonl', [
+            {'text': f'Пост {number}', 'author': 'Author'}
+            for number in range(5)
+        ])
+        with open(path + '.checkpoint', 'w') as checkpoint:
+            checkpoint.write('3')
+        self.run_import(path)
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', flat=True)),
+            ['Пост 3', 'Пост 4'],
+        )
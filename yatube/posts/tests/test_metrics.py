@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from core.metrics import registry
+
+from ..models import Post
+
+User = get_user_model()
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+        self.client = Client()
+
+    @override_settings(SERVER_TIMING=True)
+    def test_server_timing(self):
+        response = self.client.get(reverse('posts:index'))
+        timing = response['Server-Timing']
+        for name in ('app;dur=', 'db;dur=', 'tpl;dur=', 'cache;desc='):
+            with self.subTest(name=name):
+                self.assertIn(name, timing)
+        self.assertNotIn('db;dur=0.0;desc="0 q"', timing)
+
+    @override_settings(SERVER_TIMING=False)
+    def test_server_timing_disabled(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_by_view(self):
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        stats = registry.views['posts:index']
+        self.assertEqual(stats['count'], 2)
+        self.assertGreater(stats['queries'], 0)
+        self.assertGreater(stats['template_time'], 0)
+        self.assertGreater(stats['bytes'], 0)
+        self.assertGreater(stats['cache_hits'] + stats['cache_misses'], 0)
+        body = self.client.get(
+            '/metrics', HTTP_AUTHORIZATION='Bearer secret'
+        ).content.decode()
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 2',
+            body,
+        )
+        self.assertIn('yatube_db_queries_total{view="posts:index"}', body)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_forbidden(self):
+        """Адрес клиента доступа не дает, только токен или персонал."""
+        for header in ('', 'Bearer', 'Bearer wrong'):
+            with self.subTest(header=header):
+                response = self.client.get(
+                    '/metrics', HTTP_AUTHORIZATION=header,
+                    REMOTE_ADDR='127.0.0.1',
+                )
+                self.assertEqual(response.status_code, 403)
+        with self.settings(METRICS_TOKEN=''):
+            response = self.client.get(
+                '/metrics', HTTP_AUTHORIZATION='Bearer '
+            )
+            self.assertEqual(response.status_code, 403)
+        staff = User.objects.create_user(username='Staff', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get('/metrics').status_code, 200)
@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 
 from ..models import Group, Post, Comment, Follow
@@ -139,3 +140,11 @@ class PostModelTest(TestCase):
         self.assertEqual(
             comment._meta.get_field('text').help_text, 'Текст комментария'
         )
+
+    def test_follow_is_unique(self):
+        """Повторная подписка на того же автора запрещена в БД."""
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(
+                user=PostModelTest.user,
+                author=PostModelTest.author,
+            )
@@ -0,0 +1,97 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post
+from ..paginators import decode_cursor
+
+User = get_user_model()
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='Author')
+        group = Group.objects.create(
+            title='Group',
+            slug='slug',
+            description='Description'
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Пост {number}', author=author, group=group)
+            for number in range(25)
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.url = reverse(
+            'posts:group_list', kwargs={'slug': 'slug'}
+        )
+
+    def get_page(self, **params):
+        return self.client.get(self.url, params).context['page_obj']
+
+    def test_pages_follow_cursor_without_count(self):
+        """Страницы идут по курсору без COUNT и OFFSET."""
+        first = self.get_page()
+        with CaptureQueriesContext(connection) as queries:
+            second = self.get_page(cursor=first.next_cursor)
+        sql = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('COUNT', sql)
+        self.assertNotIn('OFFSET', sql)
+        third = self.get_page(cursor=second.next_cursor)
+        self.assertEqual(len(first), 10)
+        self.assertEqual(len(second), 10)
+        self.assertEqual(len(third), 5)
+        self.assertEqual(third.number, 3)
+        self.assertIsNone(third.next_cursor)
+        seen = [post.pk for post in [*first, *second, *third]]
+        self.assertEqual(len(set(seen)), 25)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_previous_cursor_returns_same_page(self):
+        """Курсор назад возвращает предыдущую страницу."""
+        first = self.get_page()
+        second = self.get_page(cursor=first.next_cursor)
+        third = self.get_page(cursor=second.next_cursor)
+        back = self.get_page(cursor=third.previous_cursor)
+        self.assertEqual(list(back), list(second))
+        self.assertEqual(back.number, 2)
+        back = self.get_page(cursor=back.previous_cursor)
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_legacy_page_number(self):
+        """Старые ссылки ?page=N продолжают работать."""
+        page = self.get_page(page=2)
+        self.assertEqual(page.number, 2)
+        self.assertEqual(list(page), list(self.get_page(
+            cursor=self.get_page().next_cursor
+        )))
+        self.assertEqual(len(self.get_page(page=100)), 5)
+
+    def test_cache_key_uses_cursor_position(self):
+        """Запросы одной страницы берут ее из одной записи кэша."""
+        first = self.get_page()
+        second = self.get_page(cursor=first.next_cursor)
+        self.get_page(page=2)
+        cases = [
+            ({'cursor': 'garbage'}, first),
+            ({'page': '0'}, first),
+            ({'page': 'abc'}, first),
+            ({'cursor': first.next_cursor + '=='}, second),
+            ({'page': '02'}, second),
+        ]
+        for params, expected in cases:
+            with self.subTest(params=params):
+                with self.assertNumQueries(0):
+                    page = self.get_page(**params)
+                self.assertEqual(list(page), list(expected))
+
+    def test_broken_cursor_opens_first_page(self):
+        self.assertIsNone(decode_cursor('не курсор'))
+        page = self.get_page(cursor='garbage')
+        self.assertEqual(page.number, 1)
+        self.assertEqual(len(page), 10)
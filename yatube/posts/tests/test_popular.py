@@ -0,0 +1,98 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, PopularPost, Post
+from ..popular import rank, score
+
+User = get_user_model()
+
+
+@override_settings(POPULAR_SIZE=2)
+class PopularTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.famous = User.objects.create_user(username='Famous')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.quiet = Post.objects.create(text='Тихий', author=cls.author)
+        cls.discussed = Post.objects.create(
+            text='Обсуждаемый', author=cls.author, group=cls.group
+        )
+        cls.followed = Post.objects.create(
+            text='Известного автора', author=cls.famous, group=cls.group
+        )
+        cls.old = Post.objects.create(text='Старый', author=cls.author)
+        Post.objects.filter(pk=cls.old.pk).update(
+            pub_date=timezone.now() - timedelta(days=30)
+        )
+        for number in range(5):
+            Comment.objects.create(
+                post=cls.discussed, author=cls.reader, text=f'Ответ {number}'
+            )
+        Follow.objects.create(user=cls.reader, author=cls.famous)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_score(self):
+        self.assertGreater(score(5, 0, 1), score(0, 0, 1))
+        self.assertGreater(score(0, 100, 1), score(0, 0, 1))
+        self.assertGreater(score(5, 0, 1), score(5, 0, 24))
+
+    def test_rank_orders_posts(self):
+        rank()
+        self.assertEqual(
+            list(PopularPost.objects.filter(group=None).values_list(
+                'post_id', flat=True
+            )),
+            [self.discussed.pk, self.followed.pk],
+        )
+        self.assertEqual(
+            PopularPost.objects.filter(group=self.group).count(), 2
+        )
+
+    def test_old_posts_need_recent_comments(self):
+        with override_settings(POPULAR_SIZE=10):
+            rank()
+            self.assertFalse(
+                PopularPost.objects.filter(post=self.old).exists()
+            )
+            Comment.objects.create(
+                post=self.old, author=self.reader, text='Вспомнили'
+            )
+            rank()
+        self.assertTrue(PopularPost.objects.filter(post=self.old).exists())
+
+    def test_popular_page(self):
+        call_command('rank_popular', stdout=StringIO())
+        response = self.client.get(reverse('posts:popular'))
+        self.assertEqual(
+            response.context['posts'], [self.discussed, self.followed]
+        )
+        with self.assertNumQueries(0):
+            self.client.get(reverse('posts:popular'))
+        response = self.client.get(
+            reverse('posts:popular'), {'group': 'group'}
+        )
+        self.assertEqual(response.context['group'], self.group)
+        self.assertEqual(len(response.context['posts']), 2)
+
+    def test_popular_page_follows_ranking(self):
+        self.assertContains(
+            self.client.get(reverse('posts:popular')), 'еще не посчитан'
+        )
+        rank()
+        self.assertContains(
+            self.client.get(reverse('posts:popular')), 'Обсуждаемый'
+        )
@@ -0,0 +1,124 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..models import Post, Group, Comment, Follow
+
+User = get_user_model()
+
+
+class PostQueriesTests(TestCase):
+    """Число запросов к БД не зависит от количества постов на странице."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='Reader')
+        groups = [
+            Group.objects.create(
+                title=f'Группа {number}',
+                slug=f'group-{number}',
+                description='Описание',
+            )
+            for number in range(2)
+        ]
+        authors = [
+            User.objects.create_user(
+                username=f'Author{number}',
+                first_name='Имя',
+                last_name=f'Фамилия {number}',
+            )
+            for number in range(3)
+        ]
+        for number in range(15):
+            Post.objects.create(
+                text=f'Пост {number}',
+                author=authors[number % 3],
+                group=groups[number % 2],
+            )
+        cls.post = Post.objects.filter(author=authors[0]).first()
+        for author in authors:
+            Comment.objects.create(
+                post=cls.post, author=author, text='Комментарий'
+            )
+            Follow.objects.create(user=cls.reader, author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_guest_pages_query_count(self):
+        pages_queries = {
+            reverse('posts:index'): 1,
+            reverse(
+                'posts:group_list', kwargs={'slug': 'group-0'}
+            ): 2,
+            reverse(
+                'posts:profile', kwargs={'username': 'Author0'}
+            ): 2,
+            reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.pk}
+            ): 2,
+        }
+        for url, queries in pages_queries.items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    self.guest_client.get(url)
+
+    def test_follow_index_query_count(self):
+        self.authorized_client.get(reverse('posts:index'))
+        with self.assertNumQueries(4):
+            self.authorized_client.get(reverse('posts:follow_index'))
+
+    def test_not_modified_pages(self):
+        """Неизмененная страница отдается с 304 без запросов и рендера."""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group-0'}),
+            reverse('posts:profile', kwargs={'username': 'Author0'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.templates, [])
+                response = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_head_requests(self):
+        """Страницы с ETag отвечают на HEAD так же, как на GET."""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group-0'}),
+            reverse('posts:profile', kwargs={'username': 'Author0'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:api_posts'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.head(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.has_header('ETag'))
+                if 'api' not in url:
+                    self.assertFalse(response.has_header('Last-Modified'))
+                self.assertEqual(
+                    self.guest_client.post(url).status_code, 405
+                )
+
+    def test_changes_refresh_pages(self):
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        etag = self.guest_client.get(url)['ETag']
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Новый комментарий'
+        )
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Новый комментарий')
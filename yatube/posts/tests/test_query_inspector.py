@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from core.queries import (
+    QueryBudgetExceeded, QueryInspector, normalize, registry
+)
+
+from ..models import Post
+
+User = get_user_model()
+
+
+def execute(sql, params, many, context):
+    return None
+
+
+class QueryInspectorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='Author')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+        self.client = Client()
+
+    def test_normalize(self):
+        self.assertEqual(
+            normalize(
+                "SELECT * FROM t WHERE id = 5 AND name = 'a''b' "
+                'AND pk IN (%s, %s,  %s)'
+            ),
+            'SELECT * FROM t WHERE id = ? AND name = ? AND pk IN (...)',
+        )
+
+    @override_settings(N_PLUS_ONE_THRESHOLD=3)
+    def test_repeated_queries(self):
+        inspector = QueryInspector()
+        for pk in range(4):
+            inspector(
+                execute, f'SELECT * FROM auth_user WHERE id = {pk}',
+                None, False, {},
+            )
+        inspector(execute, 'SAVEPOINT "s1_x1"', None, False, {})
+        inspector(execute, 'SELECT 1', None, False, {})
+        self.assertEqual(inspector.total, 5)
+        repeated = inspector.repeated()
+        self.assertEqual(list(repeated), [
+            'SELECT * FROM auth_user WHERE id = ?'
+        ])
+        count, stack = repeated['SELECT * FROM auth_user WHERE id = ?']
+        self.assertEqual(count, 4)
+        self.assertTrue(
+            any('test_query_inspector' in frame for frame in stack)
+        )
+
+    @override_settings(SLOW_QUERY_MS=0, METRICS_TOKEN='secret')
+    def test_slow_queries_logged(self):
+        with self.assertLogs('core.queries', 'WARNING') as logs:
+            self.client.get(reverse('posts:index'))
+        self.assertIn('"event": "slow_query"', logs.output[0])
+        self.assertIn('"view": "posts:index"', logs.output[0])
+        body = self.client.get(
+            '/metrics', HTTP_AUTHORIZATION='Bearer secret'
+        ).content.decode()
+        self.assertIn('yatube_slow_queries_total{view="posts:index"', body)
+
+    @override_settings(
+        QUERY_BUDGETS={'posts:index': 0}, QUERY_BUDGET_STRICT=True
+    )
+    def test_budget_exceeded(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('posts:index'))
+
+    @override_settings(
+        QUERY_BUDGETS={'posts:index': 0}, QUERY_BUDGET_STRICT=False
+    )
+    def test_budget_logged(self):
+        with self.assertLogs('core.queries', 'WARNING') as logs:
+            self.client.get(reverse('posts:index'))
+        self.assertIn('при бюджете 0', logs.output[-1])
@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post
+from ..search import find
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='Author')
+        self.other = User.objects.create_user(username='Other')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.client = Client()
+
+    def search(self, **params):
+        return self.client.get(reverse('posts:search'), params)
+
+    def found(self, query, **filters):
+        return [pk for pk, score in find(query, filters=filters)]
+
+    def check_ranking_and_updates(self):
+        rare = Post.objects.create(text='Кот спит', author=self.author)
+        often = Post.objects.create(
+            text='КОТ, кот и ещё раз кот', author=self.author
+        )
+        Post.objects.create(text='Собака лает', author=self.author)
+        self.assertEqual(self.found('кот'), [often.pk, rare.pk])
+        self.assertEqual(self.found('кот спит'), [rare.pk])
+        rare.text = 'Собака спит'
+        rare.save()
+        self.assertEqual(self.found('кот'), [often.pk])
+        often.delete()
+        self.assertEqual(self.found('кот'), [])
+
+    def test_ranking_and_updates(self):
+        """Посты индексируются при создании, правке и удалении."""
+        self.check_ranking_and_updates()
+
+    @override_settings(SEARCH_BACKEND='table')
+    def test_ranking_and_updates_in_table(self):
+        self.check_ranking_and_updates()
+
+    def test_filters(self):
+        in_group = Post.objects.create(
+            text='Новости', author=self.author, group=self.group
+        )
+        by_other = Post.objects.create(text='Новости', author=self.other)
+        self.assertEqual(
+            self.found('новости', group_id=self.group.pk), [in_group.pk]
+        )
+        response = self.search(q='новости', author='Other')
+        self.assertEqual(list(response.context['page_obj']), [by_other])
+        response = self.search(q='новости', group='group')
+        self.assertEqual(list(response.context['page_obj']), [in_group])
+
+    def test_keyset_pages(self):
+        """Страницы поиска идут по курсору без OFFSET и без повторов."""
+        for number in range(25):
+            Post.objects.create(
+                text=f'Пост номер {number}', author=self.author
+            )
+        first = self.search(q='пост').context['page_obj']
+        with CaptureQueriesContext(connection) as queries:
+            second = self.search(
+                q='пост', cursor=first.next_cursor
+            ).context['page_obj']
+        self.assertNotIn(
+            'OFFSET', ' '.join(query['sql'] for query in queries)
+        )
+        third = self.search(
+            q='пост', cursor=second.next_cursor
+        ).context['page_obj']
+        self.assertEqual((len(first), len(second), len(third)), (10, 10, 5))
+        self.assertEqual(third.number, 3)
+        self.assertIsNone(third.next_cursor)
+        seen = {post.pk for post in [*first, *second, *third]}
+        self.assertEqual(len(seen), 25)
+
+    def test_api(self):
+        post = Post.objects.create(text='Привет, мир', author=self.author)
+        response = self.client.get(reverse('posts:api_search'), {'q': 'мир'})
+        self.assertEqual(response.json()['results'][0]['id'], post.pk)
+        response = self.client.get(reverse('posts:api_search'))
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from ..models import Follow, FollowSuggestion
+from ..suggestions import Graph, load_graph, rebuild
+
+User = get_user_model()
+
+
+class GraphTests(TestCase):
+    def test_csr(self):
+        graph = Graph.from_edges([(10, 20), (10, 30), (30, 20), (40, 10)])
+        self.assertEqual(list(graph.ids), [10, 20, 30, 40])
+        self.assertEqual(sorted(graph.following(0)), [1, 2])
+        self.assertEqual(list(graph.following(1)), [])
+        self.assertEqual(sorted(graph.followers(1)), [0, 2])
+        self.assertEqual(list(graph.followers(0)), [3])
+
+    def test_suggest(self):
+        graph = Graph.from_edges([
+            (1, 2),
+            (2, 3),
+            (4, 2),
+            (4, 5),
+        ])
+        suggested = [
+            graph.ids[node]
+            for node, _ in graph.suggest(0, 10, 100, 10)
+        ]
+        self.assertEqual(suggested[0], 3)
+        self.assertIn(5, suggested)
+        self.assertNotIn(2, suggested)
+        self.assertNotIn(1, suggested)
+
+
+class SuggestionsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.friend = User.objects.create_user(username='Friend')
+        cls.author = User.objects.create_user(username='Author')
+        cls.star = User.objects.create_user(username='Star')
+        Follow.objects.create(user=cls.reader, author=cls.friend)
+        Follow.objects.create(user=cls.friend, author=cls.author)
+        Follow.objects.create(user=cls.friend, author=cls.star)
+        Follow.objects.create(user=cls.author, author=cls.star)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def suggested(self, **params):
+        response = self.client.get(reverse('posts:suggestions'), params)
+        return [author.username for author in response.context['suggestions']]
+
+    def test_rebuild_fills_table(self):
+        rebuild()
+        self.assertEqual(
+            list(FollowSuggestion.objects.filter(
+                user=self.reader
+            ).values_list('author__username', flat=True)),
+            ['Star', 'Author'],
+        )
+        self.assertEqual(
+            FollowSuggestion.objects.filter(user=None).first().author,
+            self.star,
+        )
+
+    def test_process_pool_gives_same_result(self):
+        graph = load_graph()
+        rebuild()
+        single = set(FollowSuggestion.objects.values_list(
+            'user', 'author', 'rank'
+        ))
+        rebuild(workers=2, chunk_size=1)
+        self.assertEqual(
+            set(FollowSuggestion.objects.values_list(
+                'user', 'author', 'rank'
+            )),
+            single,
+        )
+        self.assertEqual(len(graph.ids), 4)
+
+    def test_fragment_skips_followed_authors(self):
+        rebuild()
+        self.assertEqual(self.suggested(), ['Star', 'Author'])
+        self.assertEqual(self.suggested(exclude='Star'), ['Author'])
+        self.client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'Star'})
+        )
+        self.assertEqual(self.suggested(), ['Author'])
+
+    def test_new_reader_gets_popular_authors(self):
+        newcomer = User.objects.create_user(username='Newcomer')
+        rebuild()
+        self.client.force_login(newcomer)
+        self.assertEqual(self.suggested()[0], 'Star')
+
+    def test_pages_load_fragment(self):
+        for url in (
+            reverse('posts:follow_index'),
+            reverse('posts:profile', kwargs={'username': 'Star'}),
+        ):
+            self.assertContains(self.client.get(url), 'suggestions/')
+        response = Client().get(
+            reverse('posts:profile', kwargs={'username': 'Star'})
+        )
+        self.assertNotContains(response, 'suggestions/')
@@ -0,0 +1,57 @@
+import os
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import templates
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class TemplateWarmupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='Author')
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.create(text='Пост', author=author, group=group)
+
+    def setUp(self):
+        engine = templates.engine()
+        loaders = engine.loaders
+
+        def restore():
+            engine.loaders = loaders
+            engine.__dict__.pop('template_loaders', None)
+
+        self.addCleanup(restore)
+
+    def test_warm_parses_every_template(self):
+        files = sum(
+            name.endswith('.html')
+            for root, dirs, names in os.walk(settings.TEMPLATES_DIR)
+            for name in names
+        )
+        count, errors = templates.warm()
+        self.assertEqual(count, files)
+        self.assertEqual(errors, {})
+        self.assertIn(
+            'posts/includes/post_card.html', list(templates.template_names())
+        )
+
+    def test_benchmark(self):
+        out = StringIO()
+        call_command(
+            'warm_templates', '--benchmark', '--repeat', '1',
+            '--host', 'testserver', stdout=out,
+        )
+        output = out.getvalue()
+        for view in ('posts:index', 'posts:group_list', 'posts:post_detail'):
+            with self.subTest(view=view):
+                self.assertIn(view, output)
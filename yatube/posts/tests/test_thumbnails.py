@@ -0,0 +1,72 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from ..models import Post
+from ..thumbnails import generate
+from ..uploads import prepare
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='Author')
+
+    def create_post(self):
+        return Post.objects.create(
+            text='Пост с картинкой',
+            author=self.author,
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=SMALL_GIF,
+                content_type='image/gif'
+            ),
+        )
+
+    def test_upload_schedules_generation(self):
+        """Загрузка картинки ставит миниатюры в фоновую очередь."""
+        with mock.patch('posts.uploads.background.defer') as defer:
+            post = self.create_post()
+            Post.objects.create(text='Без картинки', author=self.author)
+            post.text = 'Другой текст'
+            post.save()
+        defer.assert_called_once_with(prepare, post.pk)
+
+    def test_generated_urls_are_rendered(self):
+        """Готовые миниатюры берутся из поста, а не строятся в шаблоне."""
+        with mock.patch('posts.uploads.background.defer'):
+            post = self.create_post()
+        self.assertTrue(generate(post.pk))
+        post.refresh_from_db()
+        url = post.thumbnail_urls['card']
+        self.assertTrue(url.startswith(settings.MEDIA_URL))
+        with mock.patch(
+            'sorl.thumbnail.base.ThumbnailBackend.get_thumbnail'
+        ) as get_thumbnail:
+            response = Client().get(
+                reverse('posts:post_detail', kwargs={'post_id': post.pk})
+            )
+        get_thumbnail.assert_not_called()
+        self.assertContains(response, url)
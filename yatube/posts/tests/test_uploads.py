@@ -0,0 +1,95 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..models import Post
+from ..uploads import optimize
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(name, size=(50, 50), mode='RGB', image_format='PNG'):
+    buffer = BytesIO()
+    Image.new(mode, size, color='red').save(buffer, image_format)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='Author')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def upload(self, image):
+        return self.client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост с картинкой', 'image': image},
+        )
+
+    def test_valid_image_is_accepted(self):
+        response = self.upload(make_image('ok.png'))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Post.objects.exclude(image='').exists())
+
+    def test_rejected_before_decode(self):
+        """Файл отклоняется по сигнатуре, размерам или весу."""
+        cases = {
+            'Загрузите картинку': SimpleUploadedFile(
+                'fake.png', b'<?php echo "not an image"; ?>'
+            ),
+            'Картинка слишком большая': make_image('big.png', (60, 60)),
+            'Картинка больше': make_image('heavy.png', (40, 40)),
+        }
+        limits = {
+            'Картинка слишком большая': {'MAX_IMAGE_PIXELS': 3000},
+            'Картинка больше': {'MAX_IMAGE_UPLOAD_SIZE': 32},
+        }
+        for message, image in cases.items():
+            with self.subTest(message=message):
+                with self.settings(**limits.get(message, {})):
+                    response = self.upload(image)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(
+                    message, response.context['form'].errors['image'][0]
+                )
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(IMAGE_MAX_SIDE=20)
+    def test_optimize_caps_image_size(self):
+        """Фоновая обработка уменьшает слишком большие картинки."""
+        post = Post.objects.create(
+            text='Пост', author=self.user, image=make_image('wide.png')
+        )
+        self.assertTrue(optimize(post.pk))
+        post.refresh_from_db()
+        self.assertTrue(post.image.name.endswith('.jpg'))
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (20, 20))
+
+    def test_handler_limited_to_post_forms(self):
+        """Остальные загрузки сайта идут через обработчики Django."""
+        self.assertNotIn(
+            'posts.uploads.ImageUploadHandler', settings.FILE_UPLOAD_HANDLERS
+        )
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Без токена', 'image': make_image('ok.png')},
+        )
+        self.assertTemplateUsed(response, 'core/403csrf.html')
+        self.assertFalse(Post.objects.exists())
@@ -185,14 +185,22 @@ class PostViewsTests(TestCase):
                 self.assertEqual(form_field, expected)
 
     def test_index_cache(self):
-        """Кэш работает."""
+        """Кэш работает и сбрасывается при изменении постов."""
         cache.clear()
-        response = self.authorized_client.get(reverse('posts:index'))
+        response = self.guest_client.get(reverse('posts:index'))
         before = response.content
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(before, response.content)
+        Post.objects.create(
+            text='Свежий пост',
+            author=User.objects.get(username='Author'),
+        )
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Свежий пост')
         Post.objects.all().delete()
-        response = self.authorized_client.get(reverse('posts:index'))
-        after = response.content
-        self.assertEqual(before, after)
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Свежий пост')
 
     def test_follow_works(self):
         """Подписка работает."""
@@ -0,0 +1,66 @@
+import json
+import logging
+
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.kvstores.base import KVStoreBase
+
+from .caching import bump_post
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZES = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+
+
+class MemoryKVStore(KVStoreBase):
+    """Хранилище sorl-thumbnail в памяти процесса для тестового профиля.
+
+    Штатное хранилище с холодным кэшем идет в БД за каждой картинкой,
+    и в тестах с несуществующими картинками это забивает бюджет
+    запросов.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.data = {}
+
+    def _get_raw(self, key):
+        return self.data.get(key)
+
+    def _set_raw(self, key, value):
+        self.data[key] = value
+
+    def _delete_raw(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def _find_keys_raw(self, prefix):
+        return [key for key in self.data if key.startswith(prefix)]
+
+
+def render_thumbnails(image):
+    return {
+        name: get_thumbnail(image, geometry, **options).url
+        for name, (geometry, options) in THUMBNAIL_SIZES.items()
+    }
+
+
+def generate(post_id):
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'author_id', 'group_id'
+    ).first()
+    if post is None or not post.image:
+        return False
+    try:
+        urls = render_thumbnails(post.image)
+    except Exception as error:
+        logger.warning('Нет миниатюр для поста %s: %s', post_id, error)
+        return False
+    updated = Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnails=json.dumps(urls)
+    )
+    if updated:
+        bump_post(post, post.group_id)
+    return bool(updated)
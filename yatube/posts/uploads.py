@@ -0,0 +1,183 @@
+import io
+import logging
+import os
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image
+
+from core import background
+from . import thumbnails
+from .caching import bump_post
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SIGNATURES = {
+    b'\xff\xd8\xff': 'JPEG',
+    b'\x89PNG\r\n\x1a\n': 'PNG',
+    b'GIF87a': 'GIF',
+    b'GIF89a': 'GIF',
+}
+HEADER_LIMIT = 256 * 1024
+
+
+def sniff_format(header):
+    for signature, image_format in IMAGE_SIGNATURES.items():
+        if header.startswith(signature):
+            return image_format
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'WEBP'
+    return None
+
+
+def check_header(header):
+    """Проверяет формат и размеры по заголовку, не декодируя картинку.
+
+    Возвращает текст ошибки, None для подходящей картинки или
+    NotImplemented, если заголовок еще не дочитан.
+    """
+    if len(header) < 12:
+        return NotImplemented
+    if sniff_format(header) is None:
+        return 'Загрузите картинку в формате JPEG, PNG, GIF или WEBP.'
+    try:
+        width, height = Image.open(io.BytesIO(header)).size
+    except Image.DecompressionBombError:
+        return 'Картинка слишком большая.'
+    except (OSError, SyntaxError, ValueError):
+        if len(header) < HEADER_LIMIT:
+            return NotImplemented
+        return 'Не удалось прочитать размеры картинки.'
+    if width * height > settings.MAX_IMAGE_PIXELS:
+        return f'Картинка слишком большая: {width}×{height} точек.'
+    return None
+
+
+class RejectedUpload(UploadedFile):
+    def __init__(self, name, upload_error):
+        super().__init__(io.BytesIO(), name=name, size=0)
+        self.upload_error = upload_error
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку на диск по кускам и проверяет ее по заголовку.
+
+    Картинки неизвестного формата, слишком большие по весу или по числу
+    точек отклоняются до полной загрузки: остаток файла не сохраняется.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.header = b''
+        self.checked = False
+        self.upload_error = None
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.upload_error:
+            return None
+        if start + len(raw_data) > settings.MAX_IMAGE_UPLOAD_SIZE:
+            limit = settings.MAX_IMAGE_UPLOAD_SIZE // (1024 * 1024)
+            return self.reject(f'Картинка больше {limit} МБ.')
+        if not self.checked:
+            self.header += raw_data
+            error = check_header(self.header)
+            if error is not NotImplemented:
+                self.checked = True
+                self.header = b''
+                if error:
+                    return self.reject(error)
+        return super().receive_data_chunk(raw_data, start)
+
+    def reject(self, upload_error):
+        self.upload_error = upload_error
+        self.file.close()
+        return None
+
+    def file_complete(self, file_size):
+        if self.upload_error:
+            return RejectedUpload(self.file_name, self.upload_error)
+        if not self.checked:
+            error = check_header(self.header)
+            if error:
+                self.file.close()
+                return RejectedUpload(
+                    self.file_name,
+                    error if error is not NotImplemented
+                    else 'Файл не похож на картинку.',
+                )
+        return super().file_complete(file_size)
+
+
+def image_uploads(view):
+    """Файлы запроса к view принимает только ImageUploadHandler.
+
+    Обработчики нельзя сменить после чтения request.POST, а его читает
+    CsrfViewMiddleware, поэтому проверка CSRF переносится внутрь.
+    """
+    protected = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers = [ImageUploadHandler(request)]
+        return protected(request, *args, **kwargs)
+    return wrapper
+
+
+def optimize(post_id):
+    """Ужимает картинку поста до IMAGE_MAX_SIDE и пересохраняет ее."""
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'author_id', 'group_id'
+    ).first()
+    if post is None or not post.image:
+        return False
+    with post.image.open('rb') as source:
+        original_size = post.image.size
+        image = Image.open(source)
+        if getattr(image, 'is_animated', False):
+            return False
+        oversized = max(image.size) > settings.IMAGE_MAX_SIDE
+        image.thumbnail((settings.IMAGE_MAX_SIDE, settings.IMAGE_MAX_SIDE))
+        buffer = io.BytesIO()
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image_format, extension = 'PNG', 'png'
+            image.save(buffer, image_format, optimize=True)
+        else:
+            image_format, extension = 'JPEG', 'jpg'
+            image.convert('RGB').save(
+                buffer, image_format, quality=85, optimize=True,
+                progressive=True,
+            )
+    if not oversized and buffer.tell() >= original_size:
+        return False
+    old_name = post.image.name
+    stem = os.path.splitext(old_name)[0]
+    new_name = default_storage.save(
+        f'{stem}.{extension}', ContentFile(buffer.getvalue())
+    )
+    updated = Post.objects.filter(pk=post_id, image=old_name).update(
+        image=new_name, thumbnails=''
+    )
+    default_storage.delete(old_name if updated else new_name)
+    if updated:
+        bump_post(post, post.group_id)
+    return bool(updated)
+
+
+def prepare(post_id):
+    try:
+        optimize(post_id)
+    except Exception as error:
+        logger.warning('Не удалось ужать картинку поста %s: %s',
+                       post_id, error)
+    thumbnails.generate(post_id)
+
+
+def schedule(post):
+    background.defer(prepare, post.pk)
@@ -1,11 +1,13 @@
 from django.urls import path
 
-from . import views
+from . import api, views
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('popular/', views.popular, name='popular'),
+    path('group/', views.group_index, name='groups'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
@@ -16,7 +18,37 @@ urlpatterns = [
         views.add_comment,
         name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.comments,
+        name='comments'
+    ),
+    path('search/', views.search, name='search'),
+    path('api/v1/posts/', api.posts_list, name='api_posts'),
+    path(
+        'api/v1/posts/<int:post_id>/',
+        api.post_detail,
+        name='api_post_detail'
+    ),
+    path(
+        'api/v1/groups/<slug:slug>/posts/',
+        api.group_posts,
+        name='api_group_posts'
+    ),
+    path(
+        'api/v1/profiles/<str:username>/posts/',
+        api.profile_posts,
+        name='api_profile_posts'
+    ),
+    path(
+        'api/v1/posts/<int:post_id>/comments/',
+        api.post_comments,
+        name='api_post_comments'
+    ),
+    path('api/v1/search/', api.search, name='api_search'),
+    path('export/<str:table>/', views.export, name='export'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('suggestions/', views.suggestions, name='suggestions'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
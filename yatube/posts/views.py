@@ -1,32 +1,211 @@
-from django.core.paginator import Paginator
+import hashlib
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.db.models import F
+from django.http import (
+    Http404, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse,
+)
 from django.shortcuts import render, get_object_or_404, redirect
-from django.views.decorators.cache import cache_page
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_safe
 
-from .models import Post, Group, User, Follow
-from .forms import PostForm, CommentForm
+from . import comment_queue, exports
+from .caching import (
+    attach_versions, last_modified, remember, remember_local, versions,
+)
+from .models import Post, Group, User, Follow, UserStats
+from .feeds import follow_feed_paginator
+from .forms import PostForm, CommentForm, SearchForm
+from .paginators import CommentPaginator, CursorPaginator
+from .search import SearchPaginator
+from .popular import popular_posts
+from .suggestions import suggestions_for
+from .uploads import image_uploads
 
 NUM_OF_POSTS = 10
+NUM_OF_COMMENTS = 20
+PENDING_COOKIE = 'pending_comments'
+PENDING_COOKIE_AGE = 5 * 60
+QUEUE_RETRY_AFTER = 5
+
+
+def open_page(request, paginator):
+    return paginator.get_cursor_page(
+        request.GET.get('cursor'), request.GET.get('page')
+    )
+
+
+def cached_page(request, posts, *scopes):
+    paginator = CursorPaginator(posts, NUM_OF_POSTS)
+
+    def load():
+        page = open_page(request, paginator)
+        return list(page.object_list), page.number, page.has_next()
+
+    key = paginator.page_key(
+        request.GET.get('cursor'), request.GET.get('page')
+    )
+    rows, number, has_next = remember('page', scopes, load, *key)
+    return paginator.build_page(attach_versions(rows), number, has_next)
+
+
+def group_map():
+    """Все группы по slug; меняется только при сохранении групп."""
+    return remember_local(
+        'group_map', [('groups',)],
+        lambda: {group.slug: group for group in Group.objects.all()},
+    )
+
+
+def cached_group(slug):
+    group = group_map().get(slug)
+    if group is None:
+        raise Http404('Группа не найдена')
+    return group
+
+
+def group_directory():
+    """Группы по дате последнего поста, самые активные первыми."""
+    return remember(
+        'group_directory', [('groups',), ('posts',)],
+        lambda: list(Group.objects.order_by(
+            F('last_post_at').desc(nulls_last=True), 'title'
+        )),
+    )
+
+
+def fetch_profile(**lookup):
+    """Пользователь со счетчиками, которые создаются, если их еще нет."""
+    author = User.objects.select_related('stats').filter(**lookup).first()
+    if author is not None:
+        UserStats.of(author)
+    return author
+
+
+def author_id_by_username(username):
+    """Id автора по имени; кэшируется, пока не сменится ни одно имя.
+
+    Запрос за id заодно кладет в кэш автора со счетчиками, и страница
+    профиля после ETag не ищет его второй раз.
+    """
+    def load():
+        author = fetch_profile(username=username)
+        if author is None:
+            return None
+        remember('profile', [('author', author.pk)], lambda: author)
+        return author.pk
+
+    author_id = remember('author_id', [('users',)], load, username)
+    if author_id is None:
+        raise Http404('Пользователь не найден')
+    return author_id
+
+
+def load_profile(username):
+    author_id = author_id_by_username(username)
+    return remember(
+        'profile', [('author', author_id)],
+        lambda: fetch_profile(pk=author_id),
+    )
+
+
+def conditional(scopes, personal=False):
+    """ETag и Last-Modified из версий кэша областей scopes.
+
+    Версии лежат в кэше, поэтому на If-None-Match без изменений 304
+    отдается без запросов к базе и без рендера шаблона. Для страниц,
+    которые зависят от посетителя, в ETag входят его id и CSRF-кука, а
+    Last-Modified не отдается: дата одна для всех посетителей.
+    """
+    def etag(request, **kwargs):
+        parts = [request.get_full_path(), *versions(*scopes(**kwargs))]
+        if personal:
+            parts += [
+                request.user.pk,
+                request.COOKIES.get(settings.CSRF_COOKIE_NAME),
+                request.COOKIES.get(PENDING_COOKIE),
+            ]
+        return hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+
+    def modified(request, **kwargs):
+        return last_modified(*scopes(**kwargs))
+
+    def decorator(view):
+        view = condition(etag, None if personal else modified)(view)
+        if personal:
+            view = cache_control(private=True, no_cache=True)(view)
+        return require_safe(view)
+
+    return decorator
+
+
+def feed_scopes():
+    return [('posts',)]
+
+
+def directory_scopes():
+    return [('groups',), ('posts',)]
+
+
+def popular_scopes():
+    return [('popular',), ('posts',)]
 
 
-@cache_page(20, key_prefix='index_page')
+def group_scopes(slug):
+    return [('group', cached_group(slug).pk)]
+
+
+def author_scopes(username):
+    return [('author', author_id_by_username(username))]
+
+
+def post_scopes(post_id):
+    return [('post', post_id), ('author', load_post(post_id).author_id)]
+
+
+def comment_scopes(post_id):
+    return [('post', post_id)]
+
+
+@conditional(feed_scopes, personal=True)
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, NUM_OF_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = Post.objects.with_related()
+    page_obj = cached_page(request, post_list, ('posts',))
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/index.html', context)
 
 
+@conditional(directory_scopes, personal=True)
+def group_index(request):
+    context = {
+        'groups': group_directory(),
+    }
+    return render(request, 'posts/groups.html', context)
+
+
+@conditional(popular_scopes, personal=True)
+def popular(request):
+    slug = request.GET.get('group')
+    group = cached_group(slug) if slug else None
+    posts = remember(
+        'popular', popular_scopes(), lambda: popular_posts(group), slug
+    )
+    context = {
+        'group': group,
+        'posts': attach_versions(posts),
+    }
+    return render(request, 'posts/popular.html', context)
+
+
+@conditional(group_scopes, personal=True)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.filter(group=group)
-    paginator = Paginator(posts, NUM_OF_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    group = cached_group(slug)
+    posts = Post.objects.with_related().filter(group=group)
+    page_obj = cached_page(request, posts, ('group', group.pk))
     context = {
         'group': group,
         'posts': posts,
@@ -35,14 +214,14 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@conditional(author_scopes, personal=True)
 def profile(request, username):
     user = request.user
-    profile = get_object_or_404(User, username=username)
-    posts = profile.posts.all()
-    number = posts.count()
-    paginator = Paginator(posts, NUM_OF_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    profile = load_profile(username)
+    posts = profile.posts.with_related()
+    stats = UserStats.of(profile)
+    number = stats.posts_count
+    page_obj = cached_page(request, posts, ('author', profile.pk))
     following = request.user.is_authenticated and Follow.objects.filter(
         user=request.user, author=profile
     ).exists()
@@ -50,6 +229,7 @@ def profile(request, username):
         'profile': profile,
         'posts': posts,
         'number': number,
+        'stats': stats,
         'page_obj': page_obj,
         'following': following,
         'user': user,
@@ -57,25 +237,103 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+def load_post(post_id):
+    return remember(
+        'post', [('post', post_id)],
+        lambda: get_object_or_404(
+            Post.objects.with_related().select_related('author__stats'),
+            pk=post_id
+        ),
+    )
+
+
+def load_comments(post, cursor=None):
+    """Страница комментариев: первая или следующая после cursor.
+
+    Ключ кэша — позиция из курсора, а не его текст, так что поддельные
+    курсоры не плодят записи в кэше.
+    """
+    paginator = CommentPaginator(
+        post.comments.with_related(), NUM_OF_COMMENTS
+    )
+    position = paginator.position(cursor)
+    if position is None:
+        created, pk, number = None, None, 1
+    else:
+        created, pk, number = position
+        created, number = created.isoformat(), max(number, 2)
+
+    def load():
+        page = paginator.get_cursor_page(cursor)
+        return list(page.object_list), page.has_next()
+
+    rows, has_next = remember(
+        'comments', [('post', post.pk)], load, created, pk
+    )
+    return paginator.build_page(rows, number, has_next)
+
+
+@conditional(post_scopes, personal=True)
 def post_detail(request, post_id):
-    post_detail = get_object_or_404(Post, pk=post_id)
+    post_detail = load_post(post_id)
     author = post_detail.author
     edit = False
     if author == request.user:
         edit = True
-    number = author.posts.all().count()
+    number = remember(
+        'posts_count', [('author', author.pk)],
+        lambda: UserStats.of(author).posts_count,
+    )
     form = CommentForm(request.POST or None)
-    comments = post_detail.comments.all()
+    comments = load_comments(post_detail)
     context = {
         'post_detail': post_detail,
         'number': number,
         'comments': comments,
+        'pending_comments': pending_comments(request, post_id),
         'form': form,
         'edit': edit,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@conditional(comment_scopes)
+def comments(request, post_id):
+    post = load_post(post_id)
+    context = {
+        'post_detail': post,
+        'comments': load_comments(post, request.GET.get('cursor')),
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
+def search_page(request):
+    form = SearchForm(request.GET or None)
+    if not form.is_valid():
+        return form, None
+    paginator = SearchPaginator(
+        form.cleaned_data['q'], NUM_OF_POSTS,
+        group=form.cleaned_data['group'],
+        author=form.cleaned_data['author'],
+    )
+    return form, open_page(request, paginator)
+
+
+def search(request):
+    form, page_obj = search_page(request)
+    if page_obj is not None:
+        page_obj.object_list = attach_versions(page_obj.object_list)
+    query = request.GET.copy()
+    query.pop('cursor', None)
+    context = {
+        'form': form,
+        'page_obj': page_obj,
+        'page_query': query.urlencode() + '&' if query else '',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@image_uploads
 @login_required
 def post_create(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -87,6 +345,7 @@ def post_create(request):
     return render(request, 'posts/create_post.html', {'form': form})
 
 
+@image_uploads
 @login_required
 def post_edit(request, post_id):
     is_edit = True
@@ -108,8 +367,48 @@ def post_edit(request, post_id):
     return render(request, 'posts/create_post.html', context)
 
 
+def pending_post_ids(request):
+    return request.COOKIES.get(PENDING_COOKIE, '').split(',')
+
+
+def pending_comments(request, post_id):
+    """Комментарии посетителя к посту, которые еще ждут в очереди."""
+    if not settings.COMMENT_QUEUE or not request.user.is_authenticated:
+        return []
+    if str(post_id) not in pending_post_ids(request):
+        return []
+    return comment_queue.pending(post_id, request.user)
+
+
+def queue_comment(request, post_id):
+    """Комментарий через очередь, без записи в базу во время запроса."""
+    load_post(post_id)
+    form = CommentForm(request.POST or None)
+    response = redirect('posts:post_detail', post_id=post_id)
+    if not form.is_valid():
+        return response
+    try:
+        comment_queue.enqueue(
+            post_id, request.user.pk, form.cleaned_data['text']
+        )
+    except comment_queue.QueueFull:
+        response = HttpResponse(
+            'Слишком много комментариев, повторите позже', status=503
+        )
+        response['Retry-After'] = QUEUE_RETRY_AFTER
+        return response
+    post_ids = set(pending_post_ids(request)) - {''} | {str(post_id)}
+    response.set_cookie(
+        PENDING_COOKIE, ','.join(sorted(post_ids)),
+        max_age=PENDING_COOKIE_AGE, httponly=True,
+    )
+    return response
+
+
 @login_required
 def add_comment(request, post_id):
+    if settings.COMMENT_QUEUE:
+        return queue_comment(request, post_id)
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
@@ -122,13 +421,11 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    empty = False
-    if not posts:
-        empty = True
-    paginator = Paginator(posts, NUM_OF_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = open_page(
+        request, follow_feed_paginator(request.user, NUM_OF_POSTS)
+    )
+    page_obj.object_list = attach_versions(page_obj.object_list)
+    empty = page_obj.number == 1 and not page_obj.object_list
     context = {
         'page_obj': page_obj,
         'empty': empty,
@@ -136,6 +433,24 @@ def follow_index(request):
     return render(request, 'posts/follow.html', context)
 
 
+@login_required
+@require_safe
+def suggestions(request):
+    """Фрагмент «Кого почитать»; страницы подгружают его отдельно."""
+    user = request.user
+    authors = remember(
+        'suggestions', [('suggestions',), ('author', user.pk)],
+        lambda: suggestions_for(user), user.pk,
+    )
+    exclude = request.GET.get('exclude')
+    context = {
+        'suggestions': [
+            author for author in authors if author.username != exclude
+        ],
+    }
+    return render(request, 'posts/includes/suggestions.html', context)
+
+
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
@@ -151,3 +466,28 @@ def profile_unfollow(request, username):
     if follow.exists():
         follow.delete()
     return redirect('posts:profile', username=username)
+
+
+@staff_member_required
+def export(request, table):
+    if table not in exports.TABLES:
+        raise Http404('Нет такой таблицы')
+    file_format = request.GET.get('format', 'jsonl')
+    if file_format not in exports.FORMATS:
+        file_format = 'jsonl'
+    try:
+        since = request.GET.get('since')
+        since = exports.parse_since(since) if since else None
+        after_id = int(request.GET.get('after_id', 0))
+    except ValueError as error:
+        return HttpResponseBadRequest(str(error))
+    response = StreamingHttpResponse(
+        exports.gzip_stream(
+            exports.export(table, file_format, since, after_id)
+        ),
+        content_type='application/gzip',
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{table}.{file_format}.gz"'
+    )
+    return response
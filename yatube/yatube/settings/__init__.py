@@ -0,0 +1,16 @@
+"""Настройки профиля из переменной окружения DJANGO_ENV.
+
+dev — для разработки (по умолчанию), test — для тестов, prod — боевой.
+manage.py test по умолчанию выбирает test, а pytest берет его прямо из
+DJANGO_SETTINGS_MODULE в pytest.ini.
+"""
+import os
+
+DJANGO_ENV = os.getenv('DJANGO_ENV') or 'dev'
+
+if DJANGO_ENV == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif DJANGO_ENV == 'test':
+    from .test import *  # noqa: F401,F403
+else:
+    from .dev import *  # noqa: F401,F403
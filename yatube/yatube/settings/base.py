@@ -0,0 +1,267 @@
+import os
+
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+SECRET_KEY = os.getenv(
+    'SECRET_KEY', '&s3n6ss^hu_%j*-6$w010q8r=7#=3d(bi&3*_#de3ic&wsja(z'
+)
+
+DEBUG = True
+
+ALLOWED_HOSTS = [
+    host for host in os.getenv('ALLOWED_HOSTS', '').split(',') if host
+]
+
+INSTALLED_APPS = [
+    'posts.apps.PostsConfig',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'users.apps.UsersConfig',
+    'core.apps.CoreConfig',
+    'about.apps.AboutConfig',
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.queries.QueryInspectorMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def template_settings(cached):
+    """TEMPLATES; кэширующий загрузчик не замечает правок шаблонов."""
+    loaders = TEMPLATE_LOADERS
+    if cached:
+        loaders = [('django.template.loaders.cached.Loader', loaders)]
+    return [
+        {
+            'BACKEND': 'django.template.backends.django.DjangoTemplates',
+            'DIRS': [TEMPLATES_DIR],
+            'OPTIONS': {
+                'loaders': loaders,
+                'context_processors': [
+                    'django.template.context_processors.debug',
+                    'django.template.context_processors.request',
+                    'django.contrib.auth.context_processors.auth',
+                    'django.contrib.messages.context_processors.messages',
+                    'core.context_processors.year.year',
+                ],
+            },
+        },
+    ]
+
+
+TEMPLATE_CACHE = os.getenv('TEMPLATE_CACHE') == 'True'
+TEMPLATE_WARMUP = TEMPLATE_CACHE
+TEMPLATES = template_settings(TEMPLATE_CACHE)
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+# WAL пускает читателей параллельно с писателем, NORMAL в режиме WAL не
+# теряет целостность и делает fsync только на контрольных точках.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'temp_store': 'memory',
+}
+
+
+def database_settings(conn_max_age):
+    if DB_ENGINE == 'postgresql':
+        return {
+            'default': {
+                'ENGINE': 'django.db.backends.postgresql',
+                'NAME': os.getenv('DB_NAME', 'yatube'),
+                'USER': os.getenv('DB_USER', 'yatube'),
+                'PASSWORD': os.getenv('DB_PASSWORD', ''),
+                'HOST': os.getenv('DB_HOST', 'localhost'),
+                'PORT': os.getenv('DB_PORT', '5432'),
+                'CONN_MAX_AGE': conn_max_age,
+                # Пулер в режиме транзакций (PgBouncer) не поддерживает
+                # серверные курсоры.
+                'DISABLE_SERVER_SIDE_CURSORS': (
+                    os.getenv('DB_POOLER') == 'pgbouncer'
+                ),
+            }
+        }
+    return {
+        'default': sqlite_settings(
+            os.getenv('DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+            conn_max_age,
+        )
+    }
+
+
+def sqlite_settings(name, conn_max_age):
+    return {
+        'ENGINE': 'core.db',
+        'NAME': name,
+        'CONN_MAX_AGE': conn_max_age,
+        'PRAGMAS': SQLITE_PRAGMAS,
+    }
+
+
+DATABASES = database_settings(int(os.getenv('CONN_MAX_AGE', 0)))
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+STATIC_URL = '/static/'
+STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+MAX_IMAGE_UPLOAD_SIZE = 10 * 1024 * 1024
+MAX_IMAGE_PIXELS = 40 * 1000 * 1000
+IMAGE_MAX_SIDE = 2048
+CACHE_OPTIONS = {
+    'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 10000)),
+}
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': CACHE_OPTIONS,
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION', os.path.join(BASE_DIR, 'cache')
+        ),
+        'OPTIONS': CACHE_OPTIONS,
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', 'yatube_cache'),
+        'OPTIONS': CACHE_OPTIONS,
+    },
+    'redis': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.getenv('CACHE_LOCATION', 'redis://127.0.0.1:6379/1'),
+    },
+}
+
+
+def cache_settings(backend):
+    return {
+        'default': {
+            **CACHE_BACKENDS[os.getenv('CACHE_BACKEND', backend)],
+            'TIMEOUT': 60 * 10,
+        }
+    }
+
+
+CACHES = cache_settings('locmem')
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+FEED_FANOUT_LIMIT = 1000
+FEED_BACKFILL_SIZE = 200
+POSTS_CACHE_TIMEOUT = 60 * 10
+# Рейтинг популярного: окно в часах, размер списков и веса оценки.
+POPULAR_WINDOW_HOURS = 48
+POPULAR_SIZE = 50
+POPULAR_COMMENT_WEIGHT = 1.0
+POPULAR_FOLLOWER_WEIGHT = 0.5
+POPULAR_GRAVITY = 1.5
+POPULAR_INTERVAL = 5 * 60
+# Рекомендации подписок: размер списка, предел подписчиков автора для
+# поиска похожих читателей и число похожих читателей.
+FOLLOW_SUGGESTIONS = 10
+SUGGESTION_MAX_FOLLOWERS = 1000
+SUGGESTION_SIMILAR_USERS = 50
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'auto')
+CACHE_LOCK_TIMEOUT = 10
+BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', 2))
+# Комментарии пишутся в журнал и переносятся в базу пачками в фоне.
+COMMENT_QUEUE = os.getenv('COMMENT_QUEUE') == 'True'
+COMMENT_QUEUE_PATH = os.getenv(
+    'COMMENT_QUEUE_PATH', os.path.join(BASE_DIR, 'comment_queue.sqlite3')
+)
+COMMENT_QUEUE_MAX_DEPTH = int(os.getenv('COMMENT_QUEUE_MAX_DEPTH', 10000))
+COMMENT_QUEUE_BATCH_SIZE = 500
+COMMENT_QUEUE_INTERVAL = 0.2
+COMMENT_QUEUE_CLAIM_TIMEOUT = 60
+COMMENT_QUEUE_MAX_ATTEMPTS = 5
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'True') == 'True'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+QUERY_INSPECTION_RATE = float(os.getenv('QUERY_INSPECTION_RATE', 1))
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
+N_PLUS_ONE_THRESHOLD = 5
+# Бюджеты с холодным кэшем, включая сессию и пользователя. Миниатюры
+# строятся в фоне и запросов на странице не добавляют.
+QUERY_BUDGETS = {
+    'posts:index': 3,
+    'posts:group_list': 4,
+    'posts:profile': 5,
+    'posts:follow_index': 5,
+    'posts:search': 4,
+    'posts:post_detail': 4,
+    'posts:groups': 2,
+    'posts:popular': 2,
+}
+QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT') == 'True'
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.metrics': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'core.queries': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
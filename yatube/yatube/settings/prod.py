@@ -0,0 +1,34 @@
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import (
+    BASE_DIR, DB_ENGINE, cache_settings, database_settings, sqlite_settings,
+    template_settings,
+)
+
+DEBUG = os.getenv('DEBUG') == 'True'
+SECRET_KEY = os.environ['SECRET_KEY']
+
+# Соединение с базой живет между запросами, а не открывается на каждый.
+conn_max_age = int(os.getenv('CONN_MAX_AGE', 60))
+DATABASES = database_settings(conn_max_age)
+# Кэш в базе общий для всех воркеров, и cache.add в нем атомарен, так
+# что блокировки от одновременного пересчета работают между процессами.
+CACHES = cache_settings('db')
+if DB_ENGINE == 'sqlite':
+    # SQLite пишет по одному на файл: таблица кэша живет в своем файле,
+    # чтобы запись в кэш не ждала записей постов и не задерживала их.
+    DATABASES['cache'] = sqlite_settings(
+        os.getenv(
+            'CACHE_DB_NAME', os.path.join(BASE_DIR, 'cache.sqlite3')
+        ),
+        conn_max_age,
+    )
+    DATABASE_ROUTERS = ['core.db.routers.CacheRouter']
+
+TEMPLATE_CACHE = os.getenv('TEMPLATE_CACHE', 'True') == 'True'
+TEMPLATE_WARMUP = TEMPLATE_CACHE
+TEMPLATES = template_settings(TEMPLATE_CACHE)
+
+SERVER_TIMING = os.getenv('SERVER_TIMING') == 'True'
+QUERY_INSPECTION_RATE = float(os.getenv('QUERY_INSPECTION_RATE', 0.01))
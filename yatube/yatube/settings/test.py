@@ -0,0 +1,13 @@
+from .base import *  # noqa: F401,F403
+from .base import LOGGING
+
+DJANGO_ENV = 'test'
+
+# Фоновые задачи выполняются сразу, чтобы тесты видели их результат.
+BACKGROUND_WORKERS = 0
+# В tests/ посты создаются с несуществующими картинками: миниатюры
+# ищутся в памяти, а не в БД, и не расходуют бюджет запросов.
+THUMBNAIL_KVSTORE = 'posts.thumbnails.MemoryKVStore'
+QUERY_BUDGET_STRICT = True
+LOGGING['loggers']['core.metrics']['level'] = 'WARNING'
+LOGGING['loggers']['core.queries']['level'] = 'ERROR'
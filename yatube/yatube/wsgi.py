@@ -1,7 +1,18 @@
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+if settings.TEMPLATE_WARMUP:
+    from core.templates import warm
+
+    warm()
+
+if settings.COMMENT_QUEUE:
+    from posts.comment_queue import start
+
+    start()